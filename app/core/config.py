@@ -1,15 +1,29 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
+from pathlib import Path
+from typing import Dict, Optional
 
 load_dotenv()
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: Optional[str] = None  # derived from DATABASE_URL when unset
+    DB_ECHO: bool = False  # log SQL, for debugging only
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables
     FIREBASE_SERVICE_ACCOUNT_PATH: str
     JWT_SECRET_KEY: str
-    JWT_ALGORITHM: str = "HS256"
+    JWT_ALGORITHM: str = "HS256"  # or ES256 / EdDSA, signing with the keys in JWT_KEYS_DIR
+    JWT_KEYS_DIR: Optional[str] = None  # <kid>.pem files; public-only PEMs are accepted for verification
+    JWT_ACTIVE_KID: Optional[str] = None  # defaults to the last private key by file name
+    JWKS_MAX_AGE: int = 300  # Cache-Control max-age for /.well-known/jwks.json
     JWT_EXPIRE_MINUTES: int = 30
+    JWT_REFRESH_EXPIRE_DAYS: int = 30
     FIREBASE_API_KEY: str
     INVITE_CONTINUE_URL: str = os.getenv("INVITE_CONTINUE_URL", "http://localhost:3001/verify-user?mode=invite")
     REDIS_URL: str
@@ -21,6 +35,86 @@ class Settings(BaseSettings):
     EMAIL_PASS: str
     EMAIL_FROM: str
     APP_NAME: str
+    EMAIL_USE_TLS: bool = True
+    EMAIL_POOL_SIZE: int = 4  # pooled SMTP connections, one sender per connection
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_QUEUE_SIZE: int = 10000
+
+    # Password hashing pool
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Firebase client
+    FIREBASE_AUTH_EMULATOR_HOST: Optional[str] = None  # e.g. localhost:9099 for test/stub_firebase.py
+    FIREBASE_HTTP_TIMEOUT: float = 10.0
+    FIREBASE_MAX_CONCURRENCY: int = 32
+    FIREBASE_PROJECT_ID: Optional[str] = None  # defaults to the service account's project
+    FIREBASE_VERIFY_TOKENS_LOCALLY: bool = True
+    FIREBASE_TOKEN_CACHE_SIZE: int = 10000
+    FIREBASE_HEALTH_TIMEOUT: float = 2.0  # seconds /health waits for a Firebase lookup
+
+    # Firebase user record cache
+    FIREBASE_USER_CACHE_SIZE: int = 10000
+    FIREBASE_USER_CACHE_TTL: int = 5  # seconds; how long a fresh verification can go unseen by email-login
+    FIREBASE_USER_CACHE_REDIS: bool = False  # share the cache across workers via REDIS_URL
+
+    # Authenticated principal cache for get_current_user
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 30  # seconds
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False  # trust is_active in the access token until it expires
+
+    # Email domain checks
+    DNS_TIMEOUT: float = 3.0
+    DNS_NEGATIVE_TTL: int = 300  # how long NXDOMAIN / no-MX answers are cached
+    DNS_NAMESERVERS: Optional[str] = None  # "host[:port],..." to bypass resolv.conf, e.g. a local stub
+    DISPOSABLE_DOMAINS_FILE: str = str(Path(__file__).resolve().parent.parent / "data" / "disposable_domains.txt")
+    DISPOSABLE_DOMAINS_RELOAD_SECONDS: int = 60  # how often to check the file for changes
+
+    # Access-token revocation (logout); other workers see a revocation within REVOCATION_SYNC_SECONDS
+    REVOCATION_REDIS: bool = True
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    REVOCATION_BLOOM_CAPACITY: int = 100000  # revocations per access-token lifetime before false positives grow
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # Observability: Prometheus metrics at /metrics, optional OTLP/HTTP span export
+    METRICS_ENABLED: bool = True
+    OTEL_EXPORTER_OTLP_ENDPOINT: Optional[str] = None  # e.g. http://localhost:4318/v1/traces
+    OTEL_SERVICE_NAME: str = "firebase-auth"
+
+    # Rate limiting: "scope=limit/window_seconds;..." per route, scopes are ip, email and uid
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS: bool = True  # share buckets across workers via REDIS_URL
+    RATE_LIMIT_LEASE_FRACTION: float = 0.1  # share of a limit a worker may take from Redis at once
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # key by X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_POLICIES: Dict[str, str] = {
+        "email-login": "ip=30/60;email=5/60",
+        "email-login-failure": "uid=10/900",  # wrong passwords per account
+        "refresh": "ip=60/60;uid=10/60",
+        "password-reset": "ip=10/600;email=3/900",
+        "resend-verification": "ip=10/600;email=3/900",
+    }
+
+    # Scrape jobs (app/services/scraper.py)
+    SCRAPER_HTTP2: bool = True
+    SCRAPER_MAX_CONNECTIONS: int = 20
+    SCRAPER_PER_HOST_CONCURRENCY: int = 4  # requests in flight per site, also pages fetched ahead
+    SCRAPER_DELAY: float = 0.5  # minimum seconds between request starts to one site
+    SCRAPER_TIMEOUT: float = 15.0
+    SCRAPER_MAX_RETRIES: int = 4  # on 429, 5xx and network errors
+    SCRAPER_BACKOFF: float = 1.0  # base of the jittered exponential backoff, seconds
+    SCRAPER_MAX_PAGES: int = 100
+    SCRAPER_BATCH_SIZE: int = 100  # products handed to ingest at a time as a page streams in
+    SCRAPER_USER_AGENT: str = "Mozilla/5.0 (compatible; ProductScraper/1.0)"
+
+    # Product listing
+    PRODUCTS_PAGE_SIZE: int = 50
+    PRODUCTS_MAX_PAGE_SIZE: int = 500
+
+    # Bulk invites
+    BULK_INVITE_MAX_SIZE: int = 10000
+    BULK_INVITE_CONCURRENCY: int = 16  # concurrent sign-in link generations
 
     class Config:
         env_file = ".env"
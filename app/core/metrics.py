@@ -0,0 +1,171 @@
+import asyncio
+import functools
+import time
+from contextlib import nullcontext
+from typing import Callable, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, generate_latest
+from app.core.config import settings
+
+# Both are fixed at import, so disabled instrumentation costs one check (or nothing, for decorators)
+enabled = settings.METRICS_ENABLED
+tracing = bool(settings.OTEL_EXPORTER_OTLP_ENDPOINT)
+
+registry = CollectorRegistry()
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], registry=registry
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served", registry=registry)
+STAGE_LATENCY = Histogram(
+    "app_stage_duration_seconds", "Time spent in one step of a request (bcrypt, a query, a Firebase call, ...)",
+    ["stage"], registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+DB_POOL = Gauge("db_pool_connections", "SQLAlchemy pool connections by state", ["engine", "state"], registry=registry)
+RQ_QUEUE_DEPTH = Gauge("rq_queue_depth", "Jobs waiting in the RQ queue", ["queue"], registry=registry)
+
+_tracer = None
+_tracer_provider = None
+_NOOP = nullcontext()
+_stage_histograms = {}  # stage name -> labelled child, skipping labels() on every observation
+
+
+class _Stage:
+    __slots__ = ("name", "start", "span")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.span = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self.span = _tracer.start_as_current_span(self.name)
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if enabled:
+            histogram = _stage_histograms.get(self.name)
+            if histogram is None:
+                histogram = _stage_histograms[self.name] = STAGE_LATENCY.labels(self.name)
+            histogram.observe(time.perf_counter() - self.start)
+        if self.span is not None:
+            self.span.__exit__(*exc_info)
+        return False
+
+
+def stage(name: str):
+    """`with stage("login.password_verify"):` times a block (and traces it when OTel is on)"""
+    if not enabled and _tracer is None:
+        return _NOOP
+    return _Stage(name)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator version of stage() for async functions; a no-op when instrumentation is off"""
+    def decorate(func):
+        if not (enabled or tracing):
+            return func
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency per route template (not per raw path, to bound label cardinality)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Named by method alone until routing has matched a template; raw paths would explode span names
+        span = _tracer.start_as_current_span(scope["method"]) if _tracer is not None else _NOOP
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            with span as current:
+                try:
+                    await self.app(scope, receive, send_with_status)
+                finally:
+                    route = scope.get("route")
+                    if current is not None and route is not None:
+                        current.update_name(f"{scope['method']} {route.path}")
+                        current.set_attribute("http.route", route.path)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            if enabled:
+                route = scope.get("route")
+                REQUEST_LATENCY.labels(
+                    scope["method"], route.path if route is not None else "unmatched", status_code
+                ).observe(time.perf_counter() - start)
+
+
+def _collect_runtime_stats():
+    """Point-in-time gauges read at scrape time; blocking (Redis), so run in a thread"""
+    from app.core import database
+    from app.core.resources import resources
+
+    engines = [("sync", database.engine)]
+    if database._async_engine is not None:
+        engines.append(("async", database._async_engine.sync_engine))
+    for label, engine in engines:
+        pool = engine.pool
+        for state in ("size", "checkedout", "checkedin", "overflow"):
+            # SQLite's pools don't implement all of these
+            if hasattr(pool, state):
+                DB_POOL.labels(label, state).set(getattr(pool, state)())
+    if resources.queue is not None:
+        try:
+            depth = resources.queue.count
+        except Exception:
+            return  # Redis down: leave the last known value
+        RQ_QUEUE_DEPTH.labels(resources.queue.name).set(depth)
+
+
+async def render_metrics() -> bytes:
+    await asyncio.to_thread(_collect_runtime_stats)
+    return generate_latest(registry)
+
+
+def setup_tracing():
+    """Export spans over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set (needs opentelemetry-sdk)"""
+    global _tracer, _tracer_provider
+    if not tracing or _tracer is not None:
+        return
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as e:
+        raise RuntimeError(
+            "OTEL_EXPORTER_OTLP_ENDPOINT is set but OpenTelemetry is not installed: "
+            "pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http"
+        ) from e
+    _tracer_provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    _tracer_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTEL_EXPORTER_OTLP_ENDPOINT)))
+    _tracer = _tracer_provider.get_tracer("app")
+
+
+def shutdown_tracing():
+    global _tracer, _tracer_provider
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()  # flushes pending spans
+    _tracer, _tracer_provider = None, None
+
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, Dict, Optional
+from redis import Redis
+from rq import Queue
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine, create_db_and_tables, dispose_engines
+from app.core.metrics import setup_tracing, shutdown_tracing
+from app.utils.jwt_keys import get_key_ring
+
+
+class Resources:
+    """Clients shared by every request in a worker, created once in the app lifespan"""
+
+    def __init__(self):
+        self.firebase = None
+        self.redis: Optional[Redis] = None
+        self.queue: Optional[Queue] = None
+        self.mailer = None
+        self.started = False
+
+    async def startup(self):
+        from app.services.firebase import FirebaseService
+        from app.services.mailer import get_mailer
+        from app.services.revocation import revocation_list
+
+        await asyncio.to_thread(create_db_and_tables)
+        # Parse signing keys once up front (and fail fast on a bad key file)
+        get_key_ring()
+        setup_tracing()
+        self.firebase = FirebaseService(settings.FIREBASE_SERVICE_ACCOUNT_PATH)
+        # Connections are opened lazily from this pool, so startup doesn't need Redis to be up
+        self.redis = Redis.from_url(settings.REDIS_URL, health_check_interval=30)
+        self.queue = Queue(connection=self.redis)
+        # SMTP connections are pooled and opened by the mailer's background senders
+        self.mailer = get_mailer()
+        self.mailer.start()
+        revocation_list.start()
+        self.started = True
+
+    async def shutdown(self):
+        from app.services.firebase_client import firebase_auth_client
+        from app.services.firebase_user_cache import firebase_user_cache
+        from app.services.password_service import password_hasher
+        from app.services.rate_limiter import rate_limiter
+        from app.services.revocation import revocation_list
+
+        if self.mailer is not None:
+            await self.mailer.stop(drain=True)
+        if self.firebase is not None and self.firebase.token_verifier is not None:
+            await self.firebase.token_verifier.aclose()
+        await firebase_auth_client.aclose()
+        await firebase_user_cache.aclose()
+        await rate_limiter.aclose()
+        await revocation_list.stop()
+        password_hasher.shutdown(wait=False)
+        if self.redis is not None:
+            self.redis.close()
+        await dispose_engines()
+        shutdown_tracing()
+        self.started = False
+
+    def _check_database(self) -> bool:
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _check_redis(self) -> bool:
+        try:
+            return bool(self.redis is not None and self.redis.ping())
+        except Exception:
+            return False
+
+    async def _check_firebase(self) -> bool:
+        """Look up a uid that doesn't exist; a not-found answer means Firebase is reachable and our credentials work"""
+        from firebase_admin import auth
+
+        if self.firebase is None:
+            return False
+        try:
+            await asyncio.wait_for(self.firebase.client.call(auth.get_user, "health-check"), settings.FIREBASE_HEALTH_TIMEOUT)
+        except auth.UserNotFoundError:
+            return True
+        except Exception:
+            return False
+        return True
+
+    async def health(self) -> Dict[str, Any]:
+        database, redis_ok, firebase_ok = await asyncio.gather(
+            asyncio.to_thread(self._check_database),
+            asyncio.to_thread(self._check_redis),
+            self._check_firebase(),
+        )
+        checks = {
+            "database": database,
+            "redis": redis_ok,
+            "firebase": firebase_ok,
+        }
+        result = {"healthy": all(checks.values()), "checks": checks}
+        if self.mailer is not None:
+            result["mail"] = self.mailer.stats()
+        return result
+
+
+resources = Resources()
@@ -1,16 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.core.config import settings
-from app.core.database import create_db_and_tables
+from app.core import metrics
+from app.core.resources import resources
 from app.routes.auth import router as auth_router
 from app.routes.products import router as products_router
+from app.utils.jwt_keys import get_key_ring
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create shared clients once per worker instead of per request or at import time
+    await resources.startup()
+    yield
+    await resources.shutdown()
 
-create_db_and_tables()
 
 app = FastAPI(
      title="Firebase Authentication",
     description="Backend API for Firebase Authentication",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -22,17 +34,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.enabled or metrics.tracing:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(auth_router)
 app.include_router(products_router)
 
-print(settings.DATABASE_URL)
-
 
 @app.get("/")
 async def root():
     return "Server running at http://localhost:8000"
 
 
+@app.get("/health")
+async def health():
+    result = await resources.health()
+    return JSONResponse(result, status_code=200 if result["healthy"] else 503)
+
+
+if metrics.enabled:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return Response(await metrics.render_metrics(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """Public keys for verifying our access tokens without calling back into this API"""
+    key_ring = get_key_ring()
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}",
+        "ETag": key_ring.jwks_etag,
+    }
+    if request.headers.get("if-none-match") == key_ring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(key_ring.jwks_body, media_type="application/json", headers=headers)
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,8 +1,60 @@
+from decimal import Decimal
+from sqlalchemy import DDL, Column, Index, Numeric, String, event
 from sqlmodel import SQLModel, Field
 from typing import Optional
 
+# Text search configuration for the Postgres index; search queries must use the same one for it to apply
+SEARCH_CONFIG = "simple"
+
 class Product(SQLModel, table=True):
+    # (name, id) and (price_amount, id) back the keyset pagination in products_service.list_products
+    __table_args__ = (
+        Index("ix_product_name_id", "name", "id"),
+        Index("ix_product_price_id", "price_amount", "id"),
+        Index("ix_product_currency_price", "currency", "price_amount"),
+        # Natural key for re-scrapes: products_service.ingest_products upserts on it
+        Index("ux_product_source_id", "source_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    price: str
+    price: str  # as shown on the site, e.g. "Rs. 1,299"
     image: str
+    price_amount: Optional[Decimal] = Field(default=None, sa_column=Column(Numeric(12, 2)))
+    currency: Optional[str] = Field(default=None, sa_column=Column(String(3)))
+    url: Optional[str] = None  # product page on the scraped site
+    source_id: Optional[str] = None  # site + item id (or product URL), e.g. "daraz:123456"; NULL for rows from before it existed
+    content_hash: Optional[str] = Field(default=None, sa_column=Column(String(32)))  # of the scraped fields, to skip unchanged rows
+
+# Full-text search on name: a GIN expression index on Postgres, an FTS5 table kept in sync by triggers on SQLite
+POSTGRES_SEARCH_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_product_name_search ON product USING gin (to_tsvector('{SEARCH_CONFIG}', name))",
+)
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(name, content='product', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN "
+    "INSERT INTO product_fts (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN "
+    "INSERT INTO product_fts (product_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF name ON product BEGIN "
+    "INSERT INTO product_fts (product_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO product_fts (rowid, name) VALUES (new.id, new.name); END",
+    # Indexes rows that existed before the FTS table did; a no-op on a fresh database
+    "INSERT INTO product_fts (product_fts) VALUES ('rebuild')",
+)
+
+
+def create_search_index(connection):
+    """Create the search index for this dialect; also run it once by hand on databases created before it existed"""
+    statements = {"postgresql": POSTGRES_SEARCH_DDL, "sqlite": SQLITE_SEARCH_DDL}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+event.listen(Product.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS product_fts").execute_if(dialect="sqlite"))
+
+if __name__ == "__main__":
+    # python -m app.models.products: add the search index to a database created before it existed
+    from app.core.database import engine
+    with engine.begin() as connection:
+        create_search_index(connection)
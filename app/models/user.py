@@ -22,3 +22,11 @@ class User(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
 
 
+class RefreshToken(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    token_hash: str = Field(unique=True, index=True)  # sha256 of the token; the token itself is never stored
+    user_id: int = Field(foreign_key="user.id", index=True)
+    family_id: str = Field(index=True)  # shared by every token rotated from the same login
+    expires_at: datetime
+    revoked_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.now)
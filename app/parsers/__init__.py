@@ -1 +1,27 @@
- 
\ No newline at end of file
+"""Site parsers, looked up by the domain of the URL being scraped.
+
+Each parser module has parse_response(httpx.Response) -> async iterator of product dicts, which
+parses a streamed response as its body arrives. Modules are imported on first use, so a worker
+only loads the parsers (and their libraries) its jobs need.
+"""
+import importlib
+from typing import AsyncIterator, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+# Domain -> parser module; a domain also covers its subdomains (www., m., ...)
+PARSERS: Dict[str, str] = {
+    "daraz.com.np": "app.parsers.daraz",
+    "flipkart.com": "app.parsers.flipkart",
+}
+
+def register(domain: str, module: str):
+    PARSERS[domain.lower()] = module
+
+def parser_for(url: str) -> Optional[Callable[..., AsyncIterator[dict]]]:
+    """parse_response of the parser registered for url's host or its nearest parent domain, or None"""
+    labels = (urlsplit(url).hostname or "").split(".")
+    for start in range(len(labels)):
+        module = PARSERS.get(".".join(labels[start:]))
+        if module:
+            return importlib.import_module(module).parse_response
+    return None
@@ -1,10 +1,64 @@
-def parse_products(response_json):
-    products = []
-    if 'mods' in response_json and 'listItems' in response_json['mods']:
-        for product in response_json['mods']['listItems']:
-            products.append({
-                "name": product.get("name"),
-                "price": product.get("price"),
-                "image": product.get("image")
-            })
-    return products 
\ No newline at end of file
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Union
+from urllib.parse import urljoin
+import ijson
+from app.utils.prices import parse_price
+
+ITEMS = "mods.listItems.item"
+CHUNK_SIZE = 16 * 1024  # also ijson's read size
+
+def _product(item: dict, currency: str) -> dict:
+    item_id = item.get("itemId")
+    url = item.get("productUrl")
+    price_amount, price_currency = parse_price(item.get("price"), currency)
+    return {
+        "name": item.get("name"),
+        "price": item.get("price"),
+        "image": item.get("image"),
+        "price_amount": price_amount,
+        "currency": price_currency,
+        "url": urljoin("https://www.daraz.com.np", url) if url else None,
+        "source_id": f"daraz:{item_id}" if item_id else url
+    }
+
+class _Chunks:
+    """File-like view of an iterable of byte chunks; ijson pulls from a reader several times faster than it can be pushed to"""
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        return next(self._chunks, b"") if size else b""  # ijson probes the type with read(0)
+
+class _AsyncChunks:
+    """Async file-like view of an async iterable of byte chunks, e.g. a streamed response body"""
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+
+    async def read(self, size: int = -1) -> bytes:
+        if not size:
+            return b""
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+def iter_products(chunks: Iterable[bytes], currency: str = "NPR") -> Iterator[dict]:
+    """Products from a Daraz catalog JSON response, yielded as each mods.listItems entry finishes parsing.
+
+    Only the list items are decoded into Python objects; the rest of the response (templates,
+    filters, SEO info) is scanned past without being built.
+    """
+    for item in ijson.items(_Chunks(chunks), ITEMS, buf_size=CHUNK_SIZE):
+        yield _product(item, currency)
+
+def parse_products(body: Union[str, bytes], currency: str = "NPR") -> Iterator[dict]:
+    body = body.encode() if isinstance(body, str) else body
+    return iter_products((body[start:start + CHUNK_SIZE] for start in range(0, len(body), CHUNK_SIZE)), currency)
+
+async def aiter_products(chunks: AsyncIterable[bytes], currency: str = "NPR") -> AsyncIterator[dict]:
+    """iter_products for a body still arriving"""
+    async for item in ijson.items(_AsyncChunks(chunks), ITEMS, buf_size=CHUNK_SIZE):
+        yield _product(item, currency)
+
+def parse_response(response) -> AsyncIterator[dict]:
+    """Products from a streamed (not yet read) response, parsed as its body arrives"""
+    return aiter_products(response.aiter_bytes(CHUNK_SIZE))
@@ -1,16 +1,83 @@
-from bs4 import BeautifulSoup
-
-def parse_products(response_text):
-    products = []
-    soup = BeautifulSoup(response_text, "html.parser")
-    for card in soup.select("div._1AtVbE"):
-        name = card.select_one("div._4rR01T")
-        price = card.select_one("div._30jeq3")
-        image = card.select_one("img._396cs4")
-        if name and price and image:
-            products.append({
-                "name": name.text,
-                "price": price.text,
-                "image": image["src"]
-            })
-    return products 
\ No newline at end of file
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Union
+from urllib.parse import parse_qs, urljoin, urlsplit
+from lxml import etree
+from app.utils.prices import parse_price
+
+CARD_CLASS = "_1AtVbE"
+CHUNK_SIZE = 64 * 1024
+
+def _has_class(tag: str, name: str) -> etree.XPath:
+    return etree.XPath(f'.//{tag}[contains(concat(" ", normalize-space(@class), " "), " {name} ")][1]')
+
+# Compiled once; evaluated relative to each product card
+NAME = _has_class("div", "_4rR01T")
+PRICE = _has_class("div", "_30jeq3")
+IMAGE = _has_class("img", "_396cs4")
+LINK = etree.XPath(".//a[@href][1]")
+
+def _source_id(href):
+    if not href:
+        return None
+    url = urlsplit(href)
+    pid = parse_qs(url.query).get("pid")
+    return f"flipkart:{pid[0]}" if pid else urljoin("https://www.flipkart.com", url.path)
+
+def _text(matches) -> Optional[str]:
+    return "".join(matches[0].itertext()).strip() if matches else None
+
+def _product(card) -> Optional[dict]:
+    name, price, image = _text(NAME(card)), _text(PRICE(card)), IMAGE(card)
+    if not (name and price and image and image[0].get("src")):
+        return None
+    link = LINK(card)
+    href = link[0].get("href") if link else None
+    price_amount, currency = parse_price(price, "INR")
+    return {
+        "name": name,
+        "price": price,
+        "image": image[0].get("src"),
+        "price_amount": price_amount,
+        "currency": currency,
+        "url": urljoin("https://www.flipkart.com", href) if href else None,
+        "source_id": _source_id(href)
+    }
+
+def _cards(parser) -> Iterator[dict]:
+    for _, element in parser.read_events():
+        if CARD_CLASS not in (element.get("class") or "").split():
+            continue
+        product = _product(element)
+        if product:
+            yield product
+        # Drop the parsed card and everything before it, so the tree never holds more than one card
+        element.clear(keep_tail=False)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+def iter_products(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[dict]:
+    """Products from a Flipkart search page, yielded as each card finishes parsing"""
+    parser = etree.HTMLPullParser(events=("end",), tag="div", encoding=encoding)
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _cards(parser)
+    parser.close()
+    yield from _cards(parser)
+
+def parse_products(response_text: Union[str, bytes], encoding: str = "utf-8") -> Iterator[dict]:
+    body = response_text.encode(encoding) if isinstance(response_text, str) else response_text
+    return iter_products((body[start:start + CHUNK_SIZE] for start in range(0, len(body), CHUNK_SIZE)), encoding)
+
+async def aiter_products(chunks: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator[dict]:
+    """iter_products for a body still arriving"""
+    parser = etree.HTMLPullParser(events=("end",), tag="div", encoding=encoding)
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for product in _cards(parser):
+            yield product
+    parser.close()
+    for product in _cards(parser):
+        yield product
+
+def parse_response(response) -> AsyncIterator[dict]:
+    """Products from a streamed (not yet read) response, parsed as its body arrives"""
+    return aiter_products(response.aiter_bytes(CHUNK_SIZE), response.encoding or "utf-8")
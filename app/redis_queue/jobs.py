@@ -1,27 +1,47 @@
-import requests
+import asyncio
+from collections import Counter
+from contextlib import aclosing
 from sqlmodel import Session
 from app.core.database import engine
-from app.services.products_service import create_product
+from app.services.products_service import ingest_products
+from app.services.scraper import Scraper
 from urllib.parse import quote
-from app.parsers import daraz
+from app.parsers import parser_for
+
+async def scrape_pages(url: str, parse, scraper: Scraper = None) -> dict:
+    """Fetch url page by page, saving products in batches as each page streams in; returns inserted/updated/skipped counts"""
+    counts = Counter()
+    seen = set()  # source ids this job has written, so repeated items across pages are skipped
+    owned = scraper is None
+    scraper = scraper or Scraper()
+    try:
+        with Session(engine) as session:
+            async with aclosing(scraper.paginate(url, parse)) as batches:
+                current, repeated = None, False
+                async for page, products in batches:
+                    if page != current:
+                        if repeated:
+                            break  # the site repeated its last page
+                        current, repeated = page, True
+                    repeated = repeated and all(product.get("source_id") in seen for product in products)
+                    counts.update(await asyncio.to_thread(ingest_products, session, products, seen))
+    finally:
+        if owned:
+            await scraper.aclose()
+    return {"inserted": counts["inserted"], "updated": counts["updated"], "skipped": counts["skipped"]}
 
 def scrape_daraz_products_by_keyword(keyword: str):
     encoded_keyword = quote(keyword)
     url = f"https://www.daraz.com.np/catalog/?ajax=true&isFirstRequest=true&page=1&q={encoded_keyword}"
-    response = requests.get(url)
-    products = daraz.parse_products(response.json())
-    with Session(engine) as session:
-        for product in products:
-            db_product = create_product(session, product["name"], product["price"], product["image"])
-            print(f"Inserted product: {db_product.name} (ID: {db_product.id})")
+    counts = asyncio.run(scrape_pages(url, parser_for(url)))
+    print(f"Scraped '{keyword}': {counts}")
+    return counts  # kept by RQ as the job result
 
 def scrape_products_dynamic(url: str):
-    if "daraz" in url:
-        response = requests.get(url)
-        products = daraz.parse_products(response.json())
-        with Session(engine) as session:
-            for product in products:
-                db_product = create_product(session, product["name"], product["price"], product["image"])
-                print(f"Inserted product: {db_product.name} (ID: {db_product.id})")
-    else:
-        print("No parser available for this site.")
\ No newline at end of file
+    parse = parser_for(url)
+    if parse is None:
+        print("No parser available for this site.")
+        return None
+    counts = asyncio.run(scrape_pages(url, parse))
+    print(f"Scraped {url}: {counts}")
+    return counts  # kept by RQ as the job result
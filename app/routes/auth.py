@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, SQLModel
-from datetime import datetime, timedelta
-from app.core.database import get_session
-from app.core.config import settings
-from app.utils.security import hash_password
-from app.services.dependencies import get_firebase_service, get_current_user
-from app.utils.jwt_utils import create_access_token
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlmodel import select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+from app.core.database import get_async_session
+from app.core.metrics import stage
+from app.services.password_service import PasswordHasher, get_password_hasher
+from app.services.firebase_user_cache import FirebaseUserCache, get_firebase_user_cache
+from app.services.rate_limiter import RateLimiter, get_rate_limiter
+from app.services.revocation import RevocationList, get_revocation_list
+from app.services.dependencies import get_firebase_service, get_current_user, get_token_payload, get_email_validator
 from app.services.user_service import get_or_create_user
+from app.services.principal_cache import invalidate_principal
+from app.services.token_service import issue_tokens, rotate_refresh_token, revoke_refresh_token, revoke_user_refresh_tokens
 from app.utils.email_validator import EmailValidator
+from app.services.invite_service import read_invites_csv, dedupe_invites, validate_invites, provision_invited_users, send_invitations
 
 from app.models.user import User, AuthProvider
-from app.schemas.user import UserCreate, UserLogin, UserLoginResponse, TokenResponse, GoogleAuthRequest, PasswordResetRequest, SetNewPasswordRequest, InviteRequest, VerifyInviteRequest
+from app.schemas.user import UserCreate, UserLogin, UserLoginResponse, TokenResponse, GoogleAuthRequest, PasswordResetRequest, SetNewPasswordRequest, InviteRequest, BulkInviteRequest, VerifyInviteRequest, RefreshTokenRequest, LogoutRequest
 from app.services.firebase import FirebaseService
 
 router = APIRouter(
@@ -22,29 +30,34 @@ router = APIRouter(
 @router.post("/email-register", response_model=TokenResponse)
 async def register_with_email(
     user_data: UserCreate,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    password_hasher: PasswordHasher = Depends(get_password_hasher),
+    email_validator: EmailValidator = Depends(get_email_validator)
 ):
     """Register user with email and password"""
     try:
         # Validate email
-        email_validator = EmailValidator()
-        email_validation = await email_validator.validate_email_existence(user_data.email)
-        if not email_validation['is_valid']:
+        with stage("register.email_validation"):
+            email_check = await email_validator.validate(user_data.email)
+        if not email_check.is_valid:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email validation failed: {email_validation['message']}"
+                detail=f"Email validation failed: {email_check.message}"
             )
         # Create user in Firebase from backend
-        firebase_user = await firebase_service.create_user_with_email_password(
-            email=user_data.email,
-            password=user_data.password,
-            display_name=user_data.display_name
-        )
-        hashed_password = hash_password(user_data.password)
+        with stage("register.firebase_create_user"):
+            firebase_user = await firebase_service.create_user_with_email_password(
+                email=user_data.email,
+                password=user_data.password,
+                display_name=user_data.display_name
+            )
+        with stage("register.password_hash"):
+            hashed_password = await password_hasher.hash(user_data.password)
         # Check if user already exists in our database
-        statement = select(User).where(User.email == user_data.email)
-        existing_user = session.exec(statement).first()
+        with stage("register.user_query"):
+            statement = select(User).where(User.email == user_data.email)
+            existing_user = (await session.exec(statement)).first()
         if existing_user:
             # User exists, update their info
             existing_user.firebase_uid = firebase_user["uid"]
@@ -52,8 +65,8 @@ async def register_with_email(
             existing_user.password = hashed_password
             existing_user.updated_at = datetime.now()
             session.add(existing_user)
-            session.commit()
-            session.refresh(existing_user)
+            await session.commit()
+            await session.refresh(existing_user)
             user = existing_user
         else:
             # Create new user in our database
@@ -66,20 +79,18 @@ async def register_with_email(
                 is_email_verified=firebase_user["email_verified"]  # Will be False initially
             )
             session.add(user)
-            session.commit()
-            session.refresh(user)
-        # Create access token (but user needs to verify email to use the app)
-        access_token_expires = timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.firebase_uid, "user_id": user.id},
-            secret_key=settings.JWT_SECRET_KEY,
-            algorithm=settings.JWT_ALGORITHM,
-            expires_delta=access_token_expires
-        )
+            await session.commit()
+            await session.refresh(user)
+        # Create access and refresh tokens (but user needs to verify email to use the app)
+        with stage("register.issue_tokens"):
+            access_token, refresh_token = await issue_tokens(session, user)
         return TokenResponse(
             access_token=access_token,
+            refresh_token=refresh_token,
             user=UserLoginResponse.model_validate(user)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,13 +100,21 @@ async def register_with_email(
 @router.post("/email-login", response_model=TokenResponse)
 async def login_with_email(
     user_data: UserLogin,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    http_request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    password_hasher: PasswordHasher = Depends(get_password_hasher),
+    user_cache: FirebaseUserCache = Depends(get_firebase_user_cache),
+    limiter: RateLimiter = Depends(get_rate_limiter)
 ):
     """Login user with email and password"""
+    # Before any bcrypt or Firebase work, so credential stuffing stays cheap to refuse
+    with stage("email_login.rate_limit"):
+        await limiter.check("email-login", http_request, email=user_data.email)
     # Find user in database
-    statement = select(User).where(User.email == user_data.email)
-    user = session.exec(statement).first()
+    with stage("email_login.user_query"):
+        statement = select(User).where(User.email == user_data.email)
+        user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,92 +126,123 @@ async def login_with_email(
             detail="Account not set up for email/password login"
         )
     # Verify password
-    from app.utils.security import verify_password
-    if not verify_password(user_data.password, user.password):
+    with stage("email_login.password_verify"):
+        password_ok = await password_hasher.verify(user_data.password, user.password)
+    if not password_ok:
+        # Failures only, per account: past the limit a wrong password answers 429 with Retry-After
+        await limiter.check("email-login-failure", http_request, uid=user.firebase_uid)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
-    # Fetch latest Firebase user info and sync verification status
-    firebase_user = await firebase_service.get_user_by_uid(user.firebase_uid)
-    if firebase_user["email_verified"] and not user.is_email_verified:
-        user.is_email_verified = True
-        user.updated_at = datetime.now()
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+    # Sync verification status from Firebase; once verified locally there is nothing to sync
+    if not user.is_email_verified:
+        with stage("email_login.firebase_user"):
+            firebase_user = await user_cache.get(user.firebase_uid, firebase_service.get_user_by_uid)
+        if firebase_user["email_verified"]:
+            user.is_email_verified = True
+            user.updated_at = datetime.now()
+            session.add(user)
+            await session.commit()
+            await session.refresh(user)
+            invalidate_principal(user.firebase_uid)
     if not user.is_email_verified:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Please verify your email address before logging in"
         )
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.firebase_uid, "user_id": user.id},
-        secret_key=settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-        expires_delta=access_token_expires
-    )
+    # Create access and refresh tokens
+    with stage("email_login.issue_tokens"):
+        access_token, refresh_token = await issue_tokens(session, user)
     return TokenResponse(
         access_token=access_token,
+        refresh_token=refresh_token,
         user=UserLoginResponse.model_validate(user)
     )
 
 @router.post("/login-google", response_model=TokenResponse)
 async def login_with_google(
     auth_data: GoogleAuthRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     firebase_service: FirebaseService = Depends(get_firebase_service)
 ):
     """Login/Register user with Google via Firebase ID token"""
-    # Verify the ID token
-    decoded_token = await firebase_service.verify_id_token(auth_data.id_token)
-    # Get user info from Firebase
-    firebase_user = await firebase_service.get_user_by_uid(decoded_token["uid"])
+    # Verify the ID token; its claims carry the profile, so no get_user round trip is needed
+    with stage("google_login.verify_id_token"):
+        decoded_token = await firebase_service.verify_id_token(auth_data.id_token)
     # Determine if this is a Google sign-in
-    is_google_provider = any(
-        provider.provider_id == "google.com" 
-        for provider in firebase_user.get("provider_data", [])
-    )
+    identities = decoded_token.get("firebase", {}).get("identities", {})
+    is_google_provider = "google.com" in identities
     if not is_google_provider:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This endpoint is only for Google authentication"
         )
     # Get or create user in our database
-    user = get_or_create_user(
-        session=session,
-        firebase_uid=firebase_user["uid"],
-        email=firebase_user["email"],
-        display_name=firebase_user["display_name"],
-        photo_url=firebase_user.get("photo_url"),
-        auth_provider=AuthProvider.GOOGLE,
-        is_email_verified=firebase_user["email_verified"]  # Google emails are pre-verified
-    )
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.firebase_uid, "user_id": user.id},
-        secret_key=settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-        expires_delta=access_token_expires
+    with stage("google_login.upsert_user"):
+        user = await get_or_create_user(
+            session=session,
+            firebase_uid=decoded_token["uid"],
+            email=decoded_token["email"],
+            display_name=decoded_token.get("name"),
+            photo_url=decoded_token.get("picture"),
+            auth_provider=AuthProvider.GOOGLE,
+            is_email_verified=decoded_token.get("email_verified", False)  # Google emails are pre-verified
+        )
+    # Create access and refresh tokens
+    with stage("google_login.issue_tokens"):
+        access_token, refresh_token = await issue_tokens(session, user)
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        user=UserLoginResponse.model_validate(user)
     )
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh_tokens(
+    request: RefreshTokenRequest,
+    http_request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    limiter: RateLimiter = Depends(get_rate_limiter)
+):
+    """Exchange a refresh token for a new access/refresh pair (the old refresh token stops working)"""
+    async def limit(user: User):
+        await limiter.check("refresh", http_request, uid=user.firebase_uid)
+
+    user, access_token, refresh_token = await rotate_refresh_token(session, request.refresh_token, limit)
     return TokenResponse(
         access_token=access_token,
+        refresh_token=refresh_token,
         user=UserLoginResponse.model_validate(user)
     )
 
+@router.post("/logout")
+async def logout(
+    request: LogoutRequest,
+    session: AsyncSession = Depends(get_async_session),
+    payload: dict = Depends(get_token_payload),
+    revocations: RevocationList = Depends(get_revocation_list)
+):
+    """Revoke the current access token and, if given, the refresh token's whole family"""
+    if payload.get("jti"):
+        await revocations.revoke(payload["jti"], payload.get("exp"))
+    if request.refresh_token:
+        await revoke_refresh_token(session, request.refresh_token)
+    return {"message": "Logged out"}
+
 @router.post("/resend-verification")
 async def resend_verification_email(
     email: str,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    http_request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    limiter: RateLimiter = Depends(get_rate_limiter)
 ):
     """Resend email verification link using custom SMTP."""
+    await limiter.check("resend-verification", http_request, email=email)
     # Find user in database
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -210,13 +260,16 @@ async def resend_verification_email(
 @router.post("/password-reset")
 async def password_reset(
     request: PasswordResetRequest,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    http_request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    limiter: RateLimiter = Depends(get_rate_limiter)
 ):
     email = request.email
+    await limiter.check("password-reset", http_request, email=email)
     # Find user in database
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -229,33 +282,31 @@ async def password_reset(
 @router.post("/set-new-password")
 async def set_new_password(
     request: SetNewPasswordRequest,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    password_hasher: PasswordHasher = Depends(get_password_hasher),
+    user_cache: FirebaseUserCache = Depends(get_firebase_user_cache)
 ):
     """Set a new password using oobCode and update local DB."""
-    import requests
     try:
-        firebase_api_key = settings.FIREBASE_API_KEY
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:resetPassword?key={firebase_api_key}"
-        payload = {
-            "oobCode": request.oobCode,
-            "newPassword": request.new_password
-        }
-        resp = requests.post(url, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await firebase_service.reset_password(request.oobCode, request.new_password)
         email = data["email"]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to reset password: {str(e)}")
 
-    from app.utils.security import hash_password
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if user:
-        user.password = hash_password(request.new_password)
+        user.password = await password_hasher.hash(request.new_password)
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        # Sessions started with the old password (possibly by whoever knew it) end with it
+        await revoke_user_refresh_tokens(session, user.id)
+        await session.commit()
+        await session.refresh(user)
+        await user_cache.invalidate(user.firebase_uid)
+        invalidate_principal(user.firebase_uid)
     else:
         raise HTTPException(status_code=404, detail="User not found in local database")
 
@@ -264,7 +315,7 @@ async def set_new_password(
 @router.post("/invite")
 async def invite_user(
     request: InviteRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     firebase_service: FirebaseService = Depends(get_firebase_service),
     current_user: User = Depends(get_current_user)
 ):
@@ -272,18 +323,13 @@ async def invite_user(
     display_name = request.display_name
     # 1. Ensure user exists in Firebase and get UID
     try:
-        from firebase_admin import auth as firebase_auth
-        try:
-            user_record = firebase_auth.get_user_by_email(email)
-        except firebase_auth.UserNotFoundError:
-            user_record = firebase_auth.create_user(email=email, display_name=display_name)
-        firebase_uid = user_record.uid
+        firebase_uid = await firebase_service.get_or_create_user_by_email(email, display_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create/find Firebase user: {str(e)}")
 
     # 2. Check if user already exists in local DB
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         user = User(
             firebase_uid=firebase_uid,
@@ -293,41 +339,85 @@ async def invite_user(
             auth_provider=AuthProvider.EMAIL
         )
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     # 3. Send invitation email (magic link)
     await firebase_service.send_invitation_email(email, display_name, expiry_minutes=1)
     return {"message": f"Invitation sent to {email}"}
 
+async def _stream_bulk_invite(invites, session, firebase_service, email_validator) -> StreamingResponse:
+    # Provision before streaming: the DB session is closed once the response starts
+    invites, rejected = await validate_invites(dedupe_invites(invites), email_validator)
+    ready, failed = await provision_invited_users(invites, session, firebase_service)
+    failed = {**rejected, **failed}
+
+    async def progress():
+        async for event in send_invitations(ready, failed, firebase_service):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+@router.post("/invite/bulk")
+async def bulk_invite_users(
+    request: BulkInviteRequest,
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    email_validator: EmailValidator = Depends(get_email_validator),
+    current_user: User = Depends(get_current_user)
+):
+    """Invite many users at once, streaming NDJSON progress per email."""
+    invites = [invite.model_dump() for invite in request.invites]
+    return await _stream_bulk_invite(invites, session, firebase_service, email_validator)
+
+@router.post("/invite/bulk-csv")
+async def bulk_invite_users_csv(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    email_validator: EmailValidator = Depends(get_email_validator),
+    current_user: User = Depends(get_current_user)
+):
+    """Invite users from an "email,display_name" CSV upload, streaming NDJSON progress per email."""
+    invites = await read_invites_csv(file)
+    return await _stream_bulk_invite(invites, session, firebase_service, email_validator)
+
 @router.post("/verify-invite")
 async def verify_invite(
     request: VerifyInviteRequest,
-    session: Session = Depends(get_session),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    session: AsyncSession = Depends(get_async_session),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    user_cache: FirebaseUserCache = Depends(get_firebase_user_cache)
 ):
     """Verify invitation link, mark email as verified in local DB."""
-    import requests
     try:
-        firebase_api_key = settings.FIREBASE_API_KEY
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithEmailLink?key={firebase_api_key}"
-        payload = {"oobCode": request.oobCode, "email": request.email}
-        resp = requests.post(url, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await firebase_service.sign_in_with_email_link(request.oobCode, request.email)
         email = data.get("email") or request.email
         if not email:
             raise Exception("Email not found in Firebase response.")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to verify invite: {str(e)}")
 
     # Update local DB
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if user:
         user.is_email_verified = True
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
+        await user_cache.invalidate(user.firebase_uid)
+        invalidate_principal(user.firebase_uid)
         return {"message": "Invitation verified and email marked as verified."}
     else:
-        raise HTTPException(status_code=404, detail="User not found in local database")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="User not found in local database")
+
+@router.get("/cache-stats")
+async def cache_stats(
+    user_cache: FirebaseUserCache = Depends(get_firebase_user_cache),
+    limiter: RateLimiter = Depends(get_rate_limiter),
+    current_user: User = Depends(get_current_user)
+):
+    """Hit/miss counters for the Firebase user record cache and the rate limiter."""
+    return {"firebase_user_cache": user_cache.stats(), "rate_limiter": limiter.stats()}
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
-from app.core.database import get_session
-from app.services.products_service import get_products
+import hashlib
+from decimal import Decimal
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.services.products_service import ProductFilters, dump_json, list_products, search_products, stream_products
 from app.schemas.products import ProductRead
 from rq import Queue
-from redis import Redis
-from app.core.config import settings
 from app.redis_queue.jobs import scrape_products_dynamic
+from app.services.dependencies import get_queue
 from pydantic import BaseModel
 
 router = APIRouter(
@@ -14,16 +18,67 @@ router = APIRouter(
     tags=["products"],
 )
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+def product_filters(
+    name_prefix: Optional[str] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3)
+) -> ProductFilters:
+    return ProductFilters(name_prefix, min_price, max_price, currency)
+
+def _json_response(request: Request, body: bytes, headers: dict) -> Response:
+    etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @router.get("/products", response_model=list[ProductRead])
-def read_products(session: Session = Depends(get_session)):
-    return get_products(session)
+async def read_products(
+    request: Request,
+    limit: int = Query(settings.PRODUCTS_PAGE_SIZE, ge=1, le=settings.PRODUCTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+    filters: ProductFilters = Depends(product_filters),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """One page of products, ordered by sort ("id", "name", "price", or "-" for descending).
+
+    The next page's URL is in the Link header. With format=ndjson (or Accept: application/x-ndjson)
+    every matching product is streamed instead, one JSON object per line, ignoring limit.
+    Sorting by price leaves out products without a parsed price.
+    """
+    if format == "ndjson" or (format is None and "application/x-ndjson" in request.headers.get("accept", "")):
+        return StreamingResponse(stream_products(sort, cursor, filters), media_type="application/x-ndjson")
+
+    products, next_cursor = await list_products(session, limit, sort, cursor, filters)
+    headers = {}
+    if next_cursor:
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return _json_response(request, dump_json(products), headers)
+
+@router.get("/products/search", response_model=list[ProductRead])
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(settings.PRODUCTS_PAGE_SIZE, ge=1, le=settings.PRODUCTS_MAX_PAGE_SIZE),
+    filters: ProductFilters = Depends(product_filters),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Products whose name matches every word of q (the last as a prefix), best match first"""
+    return _json_response(request, dump_json(await search_products(session, q, limit, filters)), {})
 
 class ScrapeRequest(BaseModel):
     url: str
 
 @router.post("/scrape-products")
-def trigger_scrape(request: ScrapeRequest):
-    redis_conn = Redis.from_url(settings.REDIS_URL)
-    q = Queue(connection=redis_conn)
+def trigger_scrape(request: ScrapeRequest, q: Queue = Depends(get_queue)):
     job = q.enqueue(scrape_products_dynamic, request.url)
     return {"job_id": job.id, "status": "enqueued"}
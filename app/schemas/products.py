@@ -1,9 +1,13 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class ProductCreate(BaseModel):
     name: str
     price: str
     image: str
+    price_amount: Optional[float] = None
+    currency: Optional[str] = None
+    url: Optional[str] = None
 
 class ProductRead(ProductCreate):
     id: int
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from app.models.user import AuthProvider
 from pydantic import EmailStr
 
@@ -42,9 +42,16 @@ class UserResponse(SQLModel):
 
 class TokenResponse(SQLModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     user: UserLoginResponse
 
+class RefreshTokenRequest(SQLModel):
+    refresh_token: str
+
+class LogoutRequest(SQLModel):
+    refresh_token: Optional[str] = None
+
 
 class HiddenResponse(SQLModel):
     email: EmailStr
@@ -62,6 +69,9 @@ class InviteRequest(SQLModel):
     email: EmailStr
     display_name: str = ""
 
+class BulkInviteRequest(SQLModel):
+    invites: List[InviteRequest]
+
 class VerifyInviteRequest(SQLModel):
     oobCode: str
     email: EmailStr
@@ -1,48 +1,111 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import jwt
+from rq import Queue
 from app.services.firebase import FirebaseService
 from app.models.user import User
 from app.core.config import settings
-from app.core.database import get_session
+from app.core.database import get_async_session
+from app.core.resources import resources
+from app.services.revocation import revocation_list
+from app.services.principal_cache import get_principal, cache_principal, principal_from_claims
+from app.utils.email_validator import EmailValidator, MXResolver, DEFAULT_DISPOSABLE_DOMAINS
+from app.utils.domain_blocklist import ReloadingBlocklist
+from app.utils.jwt_keys import get_key_ring
 
 
 security = HTTPBearer()
 
 
+def _mx_resolver() -> MXResolver:
+    nameservers, port = None, 53
+    if settings.DNS_NAMESERVERS:
+        nameservers = []
+        for entry in settings.DNS_NAMESERVERS.split(","):
+            host, _, entry_port = entry.strip().partition(":")
+            nameservers.append(host)
+            port = int(entry_port or port)
+    return MXResolver(
+        timeout=settings.DNS_TIMEOUT,
+        negative_ttl=settings.DNS_NEGATIVE_TTL,
+        nameservers=nameservers,
+        port=port
+    )
+
+email_validator = EmailValidator(
+    _mx_resolver(),
+    ReloadingBlocklist(
+        settings.DISPOSABLE_DOMAINS_FILE,
+        check_interval=settings.DISPOSABLE_DOMAINS_RELOAD_SECONDS,
+        fallback=DEFAULT_DISPOSABLE_DOMAINS
+    )
+)
+
+
 def get_firebase_service() -> FirebaseService:
-    """Dependency to get Firebase service instance"""
-    return FirebaseService(settings.FIREBASE_SERVICE_ACCOUNT_PATH)
+    """Dependency to get the worker's shared Firebase service instance"""
+    if resources.firebase is None:
+        resources.firebase = FirebaseService(settings.FIREBASE_SERVICE_ACCOUNT_PATH)
+    return resources.firebase
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
-) -> User:
-    """Dependency to get current authenticated user from JWT token"""
-    
+def get_queue() -> Queue:
+    """Dependency to get the worker's shared RQ queue"""
+    if resources.queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is not available"
+        )
+    return resources.queue
+
+def get_email_validator() -> EmailValidator:
+    """Dependency to get the shared email validator and its MX cache"""
+    return email_validator
+
+async def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Dependency returning the verified claims of the bearer access token"""
     try:
         # Decode JWT token
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET_KEY,
-            algorithms=settings.JWT_ALGORITHM
-        )
-        firebase_uid: str = payload.get("sub")
+        payload = get_key_ring().decode(credentials.credentials)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired"
         )
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
+    # Bloom filter lookup; only a (likely) revoked jti costs a Redis round trip
+    if payload.get("jti") and await revocation_list.is_revoked(payload["jti"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+    return payload
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    session: AsyncSession = Depends(get_async_session)
+) -> User:
+    """Dependency to get current authenticated user from JWT token"""
+    firebase_uid: str = payload.get("sub")
     
-    # Get user from database
-    statement = select(User).where(User.firebase_uid == firebase_uid)
-    user = session.exec(statement).first()
+    # Opt-in: trust the claims create_access_token embedded until the token expires
+    user = principal_from_claims(payload) if settings.AUTH_TRUST_TOKEN_CLAIMS else None
+    if user is None:
+        user = get_principal(firebase_uid)
+    if user is None:
+        # Get user from database
+        statement = select(User).where(User.firebase_uid == firebase_uid)
+        user = (await session.exec(statement)).first()
+        if user is not None:
+            user = cache_principal(user)
     
     if user is None:
         raise HTTPException(
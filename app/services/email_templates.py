@@ -0,0 +1,51 @@
+from pathlib import Path
+from typing import Dict, NamedTuple
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from app.core.config import settings
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+SUBJECTS = {
+    "verification": "Verify your email for {{ app_name }}",
+    "password_reset": "Reset your password for {{ app_name }}",
+    "invitation": "You're invited to join {{ app_name }}!",
+}
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+class EmailTemplates:
+    """Compiles every email template once and renders only the per-recipient fields"""
+
+    def __init__(self, app_name: str, directory: Path = TEMPLATE_DIR):
+        # auto_reload=False: templates never change at runtime, so skip the stat() per render
+        self.env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.env.globals["app_name"] = app_name
+        self._templates: Dict[str, Dict[str, Template]] = {}
+        for name, subject in SUBJECTS.items():
+            self._templates[name] = {
+                "subject": self.env.from_string(subject),
+                "html": self.env.get_template(f"{name}.html"),
+                "text": self.env.get_template(f"{name}.txt"),
+            }
+
+    def render(self, name: str, **context) -> RenderedEmail:
+        templates = self._templates[name]
+        return RenderedEmail(
+            subject=templates["subject"].render(**context),
+            html=templates["html"].render(**context),
+            text=templates["text"].render(**context),
+        )
+
+
+email_templates = EmailTemplates(settings.APP_NAME)
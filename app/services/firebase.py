@@ -1,23 +1,46 @@
 import os
-import smtplib
+import asyncio
+import uuid
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import firebase_admin
+import jwt
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, status
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from app.core.config import settings
+from app.services.firebase_client import AsyncFirebaseAuth, firebase_auth_client
+from app.services.firebase_tokens import get_token_verifier
+from app.services.mailer import Mailer, get_mailer
+from app.services.email_templates import EmailTemplates, RenderedEmail, email_templates
+from app.core.metrics import timed
 
 class FirebaseService:
-    def __init__(self, service_account_path: str):
+    def __init__(
+        self,
+        service_account_path: str,
+        client: AsyncFirebaseAuth = firebase_auth_client,
+        mailer: Mailer = None,
+        templates: EmailTemplates = email_templates
+    ):
         if not firebase_admin._apps:
             cred = credentials.Certificate(service_account_path)
-            firebase_admin.initialize_app(cred)
+            firebase_admin.initialize_app(cred, {"httpTimeout": settings.FIREBASE_HTTP_TIMEOUT})
+        self.client = client
+        self.mailer = mailer or get_mailer()
+        self.templates = templates
+        self.token_verifier = None
+        # The emulator issues unsigned tokens, so only verify locally against Google's keys
+        if settings.FIREBASE_VERIFY_TOKENS_LOCALLY and not settings.FIREBASE_AUTH_EMULATOR_HOST:
+            project_id = settings.FIREBASE_PROJECT_ID or firebase_admin.get_app().project_id
+            self.token_verifier = get_token_verifier(project_id, settings.FIREBASE_TOKEN_CACHE_SIZE)
     
+    @timed()
     async def create_user_with_email_password(self, email: str, password: str, display_name: str = None) -> Dict[str, Any]:
         """Create user in Firebase Auth with email and password"""
         try:
-            user_record = auth.create_user(
+            user_record = await self.client.call(
+                auth.create_user,
                 email=email,
                 password=password,
                 display_name=display_name,
@@ -38,165 +61,188 @@ class FirebaseService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already exists"
             )
+        except HTTPException:
+            raise  # e.g. the client's 504 on timeout
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to create user: {str(e)}"
             )
     
+    def _build_message(self, email: str, rendered: RenderedEmail) -> MIMEMultipart:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = rendered.subject
+        msg["From"] = settings.EMAIL_FROM
+        msg["To"] = email
+        # Clients show the last alternative they support, so plaintext goes first
+        msg.attach(MIMEText(rendered.text, "plain"))
+        msg.attach(MIMEText(rendered.html, "html"))
+        return msg
+
+    @timed()
     async def send_verification_email(self, email: str, display_name: str = ""):
         """Generate Firebase verification link and send it via SMTP with a custom template."""
         try:
             # 1. Generate the verification link
-            verification_link = auth.generate_email_verification_link(email)
-            # 2. Prepare the email
-            app_name = settings.APP_NAME
-            subject = f"Verify your email for {app_name}"
-            html = f"""
-            <html>
-              <body style='font-family: Arial, sans-serif;'>
-                <h2>Welcome to {app_name}!</h2>
-                <p>Hi {display_name or email},</p>
-                <p>Thank you for signing up. Please verify your email address by clicking the button below:</p>
-                <a href='{verification_link}' style='background: #1976d2; color: #fff; padding: 10px 20px; text-decoration: none; border-radius: 4px;'>Verify Email</a>
-                <p>If you did not create an account, you can ignore this email.</p>
-                <p>Thanks,<br>{app_name} Team</p>
-              </body>
-            </html>
-            """
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = settings.EMAIL_FROM
-            msg["To"] = email
-            msg.attach(MIMEText(html, "html"))
-            # 3. Send the email
-            with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-                server.starttls()
-                server.login(settings.EMAIL_USER, settings.EMAIL_PASS)
-                server.sendmail(msg["From"], [email], msg.as_string())
+            verification_link = await self.client.call(auth.generate_email_verification_link, email)
+            # 2. Render the email from the precompiled template
+            rendered = self.templates.render("verification", email=email, display_name=display_name, link=verification_link)
+            # 3. Queue the email; delivery happens in the background
+            self.mailer.send(self._build_message(email, rendered))
+        except HTTPException:
+            raise  # the mailer's 503 when its queue is full, or a Firebase timeout
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to send verification email: {str(e)}"
             )
     
+    @timed()
     async def send_password_reset_email(self, email: str, display_name: str = ""):
         """Generate Firebase password reset link and send it via SMTP with a custom template."""
         try:
             # 1. Generate the password reset link
-            reset_link = auth.generate_password_reset_link(email)
-            # 2. Prepare the email
-            app_name = settings.APP_NAME
-            subject = f"Reset your password for {app_name}"
-            html = f"""
-            <html>
-              <body style='font-family: Arial, sans-serif;'>
-                <h2>Password Reset for {app_name}</h2>
-                <p>Hello,</p>
-                <p>Follow this link to reset your {app_name} password for your {email} account.</p>
-                <a href='{reset_link}' style='background: #1976d2; color: #fff; padding: 10px 20px; text-decoration: none; border-radius: 4px;'>Reset Password</a>
-                <p>If you didn't ask to reset your password, you can ignore this email.</p>
-                <p>Thanks,<br>Your {app_name} team</p>
-              </body>
-            </html>
-            """
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = settings.EMAIL_FROM
-            msg["To"] = email
-            msg.attach(MIMEText(html, "html"))
-            # 3. Send the email
-            with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-                server.starttls()
-                server.login(settings.EMAIL_USER, settings.EMAIL_PASS)
-                server.sendmail(msg["From"], [email], msg.as_string())
+            reset_link = await self.client.call(auth.generate_password_reset_link, email)
+            # 2. Render the email from the precompiled template
+            rendered = self.templates.render("password_reset", email=email, display_name=display_name, link=reset_link)
+            # 3. Queue the email; delivery happens in the background
+            self.mailer.send(self._build_message(email, rendered))
+        except HTTPException:
+            raise  # the mailer's 503 when its queue is full, or a Firebase timeout
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to send password reset email: {str(e)}"
             )
     
+    @timed()
     async def verify_id_token(self, id_token: str) -> Dict[str, Any]:
         """Verify Firebase ID token and return user info"""
         try:
-            decoded_token = auth.verify_id_token(id_token)
+            if self.token_verifier is not None:
+                return await self.token_verifier.verify(id_token)
+            decoded_token = await self.client.call(auth.verify_id_token, id_token)
             return decoded_token
-        except auth.InvalidIdTokenError:
+        except (auth.InvalidIdTokenError, jwt.InvalidTokenError):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid ID token"
             )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Token verification failed: {str(e)}"
             )
     
+    @timed()
     async def get_user_by_uid(self, uid: str) -> Dict[str, Any]:
         """Get user info from Firebase by UID"""
         try:
-            user_record = auth.get_user(uid)
+            user_record = await self.client.call(auth.get_user, uid)
             return {
                 "uid": user_record.uid,
                 "email": user_record.email,
                 "display_name": user_record.display_name,
                 "photo_url": user_record.photo_url,
                 "email_verified": user_record.email_verified,
-                "provider_data": user_record.provider_data
+                "provider_data": [
+                    {"provider_id": provider.provider_id, "uid": provider.uid}
+                    for provider in user_record.provider_data
+                ]
             }
         except auth.UserNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to get user: {str(e)}"
             )
     
-    async def send_invitation_email(self, email: str, display_name: str = "", expiry_minutes: int = 1):
+    @timed()
+    async def get_or_create_user_by_email(self, email: str, display_name: str = "") -> str:
+        """Return the Firebase UID for email, creating a passwordless user if needed"""
+        try:
+            user_record = await self.client.call(auth.get_user_by_email, email)
+        except auth.UserNotFoundError:
+            user_record = await self.client.call(auth.create_user, email=email, display_name=display_name)
+        return user_record.uid
+
+    @timed()
+    async def reset_password(self, oob_code: str, new_password: str) -> Dict[str, Any]:
+        """Apply a password reset oobCode via the Identity Toolkit REST API"""
+        return await self.client.rest_post("resetPassword", {"oobCode": oob_code, "newPassword": new_password})
+
+    @timed()
+    async def sign_in_with_email_link(self, oob_code: str, email: str) -> Dict[str, Any]:
+        """Complete an email link sign-in via the Identity Toolkit REST API"""
+        return await self.client.rest_post("signInWithEmailLink", {"oobCode": oob_code, "email": email})
+
+    @timed()
+    async def get_uids_by_email(self, emails: List[str]) -> Dict[str, str]:
+        """Batch lookup of existing Firebase users; returns email -> uid for those found"""
+        chunks = [emails[i:i + 100] for i in range(0, len(emails), 100)]  # get_users limit
+        results = await asyncio.gather(*(
+            self.client.call(auth.get_users, [auth.EmailIdentifier(email) for email in chunk])
+            for chunk in chunks
+        ))
+        return {user.email.lower(): user.uid for result in results for user in result.users}
+
+    @timed()
+    async def import_users(self, users: List[Dict[str, str]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Batch create passwordless Firebase users from {"email", "display_name"} dicts.
+
+        Returns (email -> uid for created users, email -> reason for failures).
+        """
+        created, failed = {}, {}
+        for start in range(0, len(users), 1000):  # import_users limit
+            chunk = users[start:start + 1000]
+            records = [
+                auth.ImportUserRecord(
+                    uid=uuid.uuid4().hex[:28],
+                    email=user["email"],
+                    display_name=user.get("display_name") or None,
+                    email_verified=False
+                )
+                for user in chunk
+            ]
+            result = await self.client.call(auth.import_users, records)
+            errors = {error.index: error.reason for error in result.errors}
+            for index, record in enumerate(records):
+                if index in errors:
+                    failed[record.email] = errors[index]
+                else:
+                    created[record.email] = record.uid
+        return created, failed
+
+    @timed()
+    async def send_invitation_email(self, email: str, display_name: str = "", expiry_minutes: int = 1, ensure_user: bool = True):
         """Generate Firebase email sign-in (magic) link and send it via SMTP with a custom template. Create user if not exists."""
         try:
-            # 1. Ensure user exists in Firebase
-            try:
-                user_record = auth.get_user_by_email(email)
-            except auth.UserNotFoundError:
-                user_record = auth.create_user(email=email, display_name=display_name)
+            # 1. Ensure user exists in Firebase (bulk invites have already provisioned them)
+            if ensure_user:
+                await self.get_or_create_user_by_email(email, display_name)
             # 2. Generate the sign-in link with custom ActionCodeSettings, including email in continueUrl
-            from firebase_admin import auth as firebase_auth
-            from urllib.parse import urlencode
             continue_url = f"{settings.INVITE_CONTINUE_URL}?email={email}"
-            action_code_settings = firebase_auth.ActionCodeSettings(
+            action_code_settings = auth.ActionCodeSettings(
                 url=continue_url,  # e.g., your frontend registration page with email param
                 handle_code_in_app=True,
             )
-            sign_in_link = firebase_auth.generate_sign_in_with_email_link(email, action_code_settings)
-            # 3. Prepare the email
-            app_name = settings.APP_NAME
-            subject = f"You're invited to join {app_name}!"
-            html = f"""
-            <html>
-              <body style='font-family: Arial, sans-serif;'>
-                <h2>Invitation to {app_name}</h2>
-                <p>Hi {display_name or email},</p>
-                <p>You have been invited to join {app_name}. Click the button below to set your password and activate your account. This link will expire in {expiry_minutes} minute(s).</p>
-                <a href='{sign_in_link}' style='background: #1976d2; color: #fff; padding: 10px 20px; text-decoration: none; border-radius: 4px;'>Accept Invitation</a>
-                <p>If you did not expect this invitation, you can ignore this email.</p>
-                <p>Thanks,<br>{app_name} Team</p>
-              </body>
-            </html>
-            """
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = settings.EMAIL_FROM
-            msg["To"] = email
-            msg.attach(MIMEText(html, "html"))
-            # 4. Send the email
-            with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-                server.starttls()
-                server.login(settings.EMAIL_USER, settings.EMAIL_PASS)
-                server.sendmail(msg["From"], [email], msg.as_string())
+            sign_in_link = await self.client.call(auth.generate_sign_in_with_email_link, email, action_code_settings)
+            # 3. Render the email from the precompiled template
+            rendered = self.templates.render(
+                "invitation", email=email, display_name=display_name, link=sign_in_link, expiry_minutes=expiry_minutes
+            )
+            # 4. Queue the email; delivery happens in the background
+            self.mailer.send(self._build_message(email, rendered))
+        except HTTPException:
+            raise  # the mailer's 503 when its queue is full, or a Firebase timeout
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,98 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import httpx
+from fastapi import HTTPException, status
+from app.core.config import settings
+
+
+class AsyncFirebaseAuth:
+    """Async adapter around the blocking firebase_admin.auth API and the Identity Toolkit REST API"""
+
+    def __init__(self, max_concurrency: int = 32, timeout: float = 10.0, emulator_host: Optional[str] = None):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http: Optional[httpx.AsyncClient] = None
+        if emulator_host:
+            self.rest_base_url = f"http://{emulator_host}/identitytoolkit.googleapis.com"
+        else:
+            self.rest_base_url = "https://identitytoolkit.googleapis.com"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="firebase")
+        return self._executor
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking firebase_admin call on the worker pool with a timeout"""
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs)),
+                    self.timeout
+                )
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Firebase request timed out"
+                )
+
+    def _get_http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.rest_base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+        return self._http
+
+    async def rest_post(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST to a public Identity Toolkit accounts method, e.g. "resetPassword" """
+        async with self._semaphore:
+            try:
+                resp = await self._get_http().post(
+                    f"/v1/accounts:{method}",
+                    params={"key": settings.FIREBASE_API_KEY},
+                    json=payload
+                )
+            except httpx.TimeoutException:
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Firebase request timed out"
+                )
+            except httpx.TransportError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Firebase request failed: {e}"
+                )
+        if resp.status_code >= 500:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Firebase returned {resp.status_code}"
+            )
+        resp.raise_for_status()  # 4xx, e.g. an expired oobCode, is the caller's to report
+        return resp.json()
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        # A later lifespan may run on a new event loop, which a used semaphore can't be shared with
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+
+firebase_auth_client = AsyncFirebaseAuth(
+    max_concurrency=settings.FIREBASE_MAX_CONCURRENCY,
+    timeout=settings.FIREBASE_HTTP_TIMEOUT,
+    emulator_host=settings.FIREBASE_AUTH_EMULATOR_HOST,
+)
@@ -0,0 +1,140 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import httpx
+import jwt
+from cryptography import x509
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens locally against Google's cached signing certificates"""
+
+    def __init__(
+        self,
+        project_id: str,
+        certs_url: str = GOOGLE_CERTS_URL,
+        cache_size: int = 10000,
+        refresh_margin: int = 300,
+        clock_skew: int = 5,
+    ):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.certs_url = certs_url
+        self.cache_size = cache_size
+        self.refresh_margin = refresh_margin
+        self.clock_skew = clock_skew
+        self._keys: Dict[str, Any] = {}
+        self._keys_expire_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._verified: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def _fetch_keys(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        resp = await self._http.get(self.certs_url)
+        resp.raise_for_status()
+        keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode()).public_key()
+            for kid, pem in resp.json().items()
+        }
+        match = _MAX_AGE_RE.search(resp.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else 3600
+        now = time.monotonic()
+        self._keys = keys
+        self._keys_expire_at = now + max_age
+        self._last_fetch = now
+        self._schedule_refresh(max(max_age - self.refresh_margin, 1))
+
+    def _schedule_refresh(self, delay: float):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_later(delay))
+
+    async def _refresh_later(self, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            async with self._lock:
+                await self._fetch_keys()
+        except Exception:
+            # Keep serving the current keys until they expire, and try again shortly
+            self._refresh_task = None
+            self._schedule_refresh(30)
+
+    async def get_keys(self, force: bool = False) -> Dict[str, Any]:
+        """Return the current kid -> public key map, fetching it if missing or expired"""
+        if force or not self._keys or time.monotonic() >= self._keys_expire_at:
+            async with self._lock:
+                now = time.monotonic()
+                # Don't let tokens with unknown key ids force a fetch more than once a minute
+                stale = not self._keys or now >= self._keys_expire_at
+                if stale or (force and now - self._last_fetch > 60):
+                    await self._fetch_keys()
+        return self._keys
+
+    async def verify(self, id_token: str) -> Dict[str, Any]:
+        """Verify an ID token and return its claims, with "uid" set like firebase_admin does"""
+        cached = self._verified.get(id_token)
+        if cached is not None:
+            if cached["exp"] > time.time():
+                self._verified.move_to_end(id_token)
+                return cached
+            del self._verified[id_token]
+
+        header = jwt.get_unverified_header(id_token)
+        if header.get("alg") != "RS256":
+            raise jwt.InvalidAlgorithmError("Firebase ID tokens must be signed with RS256")
+        kid = header.get("kid")
+        keys = await self.get_keys()
+        if kid not in keys:
+            # Google may have rotated keys before our cached set expired
+            keys = await self.get_keys(force=True)
+        if kid not in keys:
+            raise jwt.InvalidTokenError("ID token has an unknown key id")
+
+        claims = jwt.decode(
+            id_token,
+            keys[kid],
+            algorithms=["RS256"],
+            audience=self.project_id,
+            issuer=self.issuer,
+            leeway=self.clock_skew,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+        if not claims["sub"] or len(claims["sub"]) > 128:
+            raise jwt.InvalidTokenError("ID token has an invalid subject")
+        if claims.get("auth_time", 0) > time.time() + self.clock_skew:
+            raise jwt.ImmatureSignatureError("ID token has a future auth_time")
+        claims["uid"] = claims["sub"]
+
+        self._verified[id_token] = claims
+        if len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+        return claims
+
+    async def aclose(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_verifier: Optional[FirebaseTokenVerifier] = None
+
+
+def get_token_verifier(project_id: str, cache_size: int = 10000) -> FirebaseTokenVerifier:
+    """Return the process-wide verifier, creating it on first use"""
+    global _verifier
+    if _verifier is None or _verifier.project_id != project_id:
+        _verifier = FirebaseTokenVerifier(project_id, cache_size=cache_size)
+    return _verifier
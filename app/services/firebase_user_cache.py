@@ -0,0 +1,85 @@
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+from cachetools import TTLCache
+from redis import RedisError
+from redis.asyncio import Redis
+from app.core.config import settings
+
+
+class FirebaseUserCache:
+    """TTL+LRU cache of Firebase user records with an optional shared Redis tier"""
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 5, redis_url: Optional[str] = None, prefix: str = "firebase_user:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._redis = Redis.from_url(redis_url) if redis_url else None
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, uid: str, loader: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return the cached record for uid, loading it with loader(uid) on a miss"""
+        record = self._local.get(uid)
+        if record is not None:
+            self.hits += 1
+            return record
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.prefix + uid)
+            except RedisError:
+                raw = None
+            if raw:
+                self.redis_hits += 1
+                record = json.loads(raw)
+                self._local[uid] = record
+                return record
+        self.misses += 1
+        record = await loader(uid)
+        # Email-login only asks about users not yet verified locally, so these are mostly unverified
+        # records; a verification made through Firebase's own link shows up once the TTL runs out
+        await self.set(uid, record)
+        return record
+
+    async def set(self, uid: str, record: Dict[str, Any]):
+        self._local[uid] = record
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.prefix + uid, json.dumps(record), ex=self.ttl)
+            except RedisError:
+                pass
+
+    async def invalidate(self, uid: str):
+        """Drop uid from both tiers, e.g. after its verification or password changed"""
+        self._local.pop(uid, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self.prefix + uid)
+            except RedisError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "size": len(self._local),
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+firebase_user_cache = FirebaseUserCache(
+    maxsize=settings.FIREBASE_USER_CACHE_SIZE,
+    ttl=settings.FIREBASE_USER_CACHE_TTL,
+    redis_url=settings.REDIS_URL if settings.FIREBASE_USER_CACHE_REDIS else None,
+)
+
+
+def get_firebase_user_cache() -> FirebaseUserCache:
+    """Dependency to get the shared Firebase user record cache"""
+    return firebase_user_cache
@@ -0,0 +1,162 @@
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models.user import User, AuthProvider
+from app.services.firebase import FirebaseService
+from app.utils.email_validator import EmailValidator
+
+UPSERT_CHUNK_SIZE = 500  # keeps bind parameters under SQLite's limit
+CSV_ROW_BYTES = 512  # a maximal 254-byte email plus a generous display name
+
+
+def parse_invites_csv(content: bytes) -> List[Dict[str, str]]:
+    """Read "email[,display_name]" rows, with or without a header line"""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV file must be UTF-8 encoded")
+    rows = csv.reader(io.StringIO(text))
+    invites = []
+    for row in rows:
+        if not row or not row[0].strip():
+            continue
+        email = row[0].strip()
+        if email.lower() == "email":
+            continue
+        invites.append({"email": email, "display_name": row[1].strip() if len(row) > 1 else ""})
+    return invites
+
+
+async def read_invites_csv(file: UploadFile) -> List[Dict[str, str]]:
+    """parse_invites_csv for an upload, refusing files too big to hold BULK_INVITE_MAX_SIZE rows"""
+    limit = settings.BULK_INVITE_MAX_SIZE * CSV_ROW_BYTES
+    content = await file.read(limit + 1)
+    if len(content) > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"CSV file is larger than {limit} bytes"
+        )
+    return parse_invites_csv(content)
+
+
+def dedupe_invites(invites: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Lowercase emails (as Firebase does) and keep the first row per address"""
+    seen = {}
+    for invite in invites:
+        email = invite["email"].strip().lower()
+        if email and email not in seen:
+            seen[email] = {"email": email, "display_name": invite.get("display_name") or ""}
+    if len(seen) > settings.BULK_INVITE_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BULK_INVITE_MAX_SIZE} invites per request"
+        )
+    return list(seen.values())
+
+
+async def validate_invites(
+    invites: List[Dict[str, str]],
+    email_validator: EmailValidator
+) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+    """Validate all invitees in one batch; returns (valid invites, email -> reason for the rest)"""
+    checks = await email_validator.validate_many([invite["email"] for invite in invites])
+    valid, rejected = [], {}
+    for invite, check in zip(invites, checks):
+        if check.is_valid:
+            valid.append(invite)
+        else:
+            rejected[invite["email"]] = f"Email validation failed: {check.message}"
+    return valid, rejected
+
+
+async def upsert_invited_users(session: AsyncSession, rows: List[Dict[str, Any]]):
+    """Insert invited users in one transaction, leaving existing local users untouched"""
+    dialect = session.bind.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        statement = insert(User).values(rows[start:start + UPSERT_CHUNK_SIZE]).on_conflict_do_nothing()
+        await session.execute(statement)
+    await session.commit()
+
+
+async def provision_invited_users(
+    invites: List[Dict[str, str]],
+    session: AsyncSession,
+    firebase_service: FirebaseService
+) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+    """Ensure every invitee exists in Firebase and locally using batch calls.
+
+    Returns (invites ready to be emailed, email -> reason for invites that failed).
+    """
+    # 1. Batch lookup, then batch import whoever is missing from Firebase
+    uids = await firebase_service.get_uids_by_email([invite["email"] for invite in invites])
+    missing = [invite for invite in invites if invite["email"] not in uids]
+    created, failed = await firebase_service.import_users(missing) if missing else ({}, {})
+    uids.update(created)
+    failed = {email: f"Failed to create Firebase user: {reason}" for email, reason in failed.items()}
+
+    # 2. One multi-row insert for the local users table
+    now = datetime.now()
+    ready = [invite for invite in invites if invite["email"] in uids]
+    await upsert_invited_users(session, [
+        {
+            "firebase_uid": uids[invite["email"]],
+            "email": invite["email"],
+            "display_name": invite["display_name"],
+            "auth_provider": AuthProvider.EMAIL,
+            "is_email_verified": False,
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for invite in ready
+    ])
+    return ready, failed
+
+
+async def send_invitations(
+    invites: List[Dict[str, str]],
+    failed: Dict[str, str],
+    firebase_service: FirebaseService,
+    expiry_minutes: int = 1
+) -> AsyncIterator[Dict[str, Any]]:
+    """Generate links and queue emails with bounded concurrency, yielding one progress record per email"""
+    total = len(invites) + len(failed)
+    yield {"event": "started", "total": total}
+    for email, reason in failed.items():
+        yield {"email": email, "status": "failed", "error": reason}
+
+    pending = asyncio.Queue()
+    for invite in invites:
+        pending.put_nowait(invite)
+    progress = asyncio.Queue()
+
+    async def worker():
+        while not pending.empty():
+            invite = pending.get_nowait()
+            try:
+                await firebase_service.send_invitation_email(
+                    invite["email"], invite["display_name"], expiry_minutes=expiry_minutes, ensure_user=False
+                )
+                progress.put_nowait({"email": invite["email"], "status": "sent"})
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                progress.put_nowait({"email": invite["email"], "status": "failed", "error": detail})
+
+    workers = [asyncio.create_task(worker()) for _ in range(settings.BULK_INVITE_CONCURRENCY)]
+    sent = 0
+    try:
+        for _ in invites:
+            result = await progress.get()
+            sent += result["status"] == "sent"
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+    yield {"event": "done", "total": total, "sent": sent, "failed": total - sent}
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections open and hands them out to senders"""
+
+    def __init__(self, host: str, port: int, username: str = "", password: str = "",
+                 size: int = 4, use_tls: bool = True, timeout: float = 30.0, idle_check: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self._idle: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        self.connections_opened += 1
+        return conn
+
+    def acquire(self) -> smtplib.SMTP:
+        """Blocking; returns a live connection, reusing an idle one when possible"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used < self.idle_check:
+                    return conn
+                # Long-idle connections may have been dropped by the server
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn
+                except smtplib.SMTPException:
+                    pass
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False):
+        if broken:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    def _discard(self, conn: smtplib.SMTP):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except Exception:
+                self._discard(conn)
+
+
+class Mailer:
+    """Queues outgoing mail and delivers it in background batches over pooled SMTP connections"""
+
+    def __init__(self, pool: SMTPConnectionPool, workers: int = 2, batch_size: int = 20,
+                 max_retries: int = 3, backoff: float = 1.0, max_queue: int = 10000):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self._queue: "asyncio.Queue[Tuple[Message, int]]" = asyncio.Queue(maxsize=max_queue)
+        self._tasks: List[asyncio.Task] = []
+        self._retries: set = set()
+        self.sent = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if not self._tasks:
+            # A queue that has been waited on is tied to that event loop, and a later lifespan
+            # (or test client) may run on another one; carry over anything left undelivered
+            leftover = self._queue
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            while not leftover.empty():
+                self._queue.put_nowait(leftover.get_nowait())
+            self._tasks = [asyncio.get_running_loop().create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain: bool = True, timeout: float = 10.0):
+        if drain and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+        await asyncio.to_thread(self.pool.close)
+
+    def send(self, msg: Message):
+        """Queue msg for delivery and return immediately"""
+        self.start()
+        try:
+            self._queue.put_nowait((msg, 0))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Mail queue is full, please retry shortly"
+            )
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                failures, refused = await asyncio.to_thread(self._deliver, [msg for msg, _ in batch])
+            except Exception:
+                failures, refused = list(range(len(batch))), 0
+            for index in failures:
+                self._retry(*batch[index])
+            self.failed += refused
+            self.sent += len(batch) - len(failures) - refused
+            for _ in batch:
+                self._queue.task_done()
+
+    def _deliver(self, messages: List[Message]) -> Tuple[List[int], int]:
+        """Send a batch on one connection; returns (indexes to retry, refused count)"""
+        try:
+            conn = self.pool.acquire()
+        except Exception:
+            return list(range(len(messages))), 0
+        failures = []
+        refused = 0
+        broken = False
+        for index, msg in enumerate(messages):
+            if broken:
+                failures.append(index)
+                continue
+            try:
+                conn.sendmail(msg["From"], [msg["To"]], msg.as_string())
+            except smtplib.SMTPRecipientsRefused:
+                # Retrying won't help a rejected address
+                logger.warning("SMTP server refused recipient %s", msg["To"])
+                refused += 1
+            except (smtplib.SMTPException, OSError):
+                failures.append(index)
+                broken = True
+        self.pool.release(conn, broken=broken)
+        return failures, refused
+
+    def _retry(self, msg: Message, attempt: int):
+        if attempt >= self.max_retries:
+            self.failed += 1
+            logger.error("Giving up on email to %s after %d attempts", msg["To"], attempt + 1)
+            return
+        delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+        async def requeue():
+            await asyncio.sleep(delay)
+            await self._queue.put((msg, attempt + 1))
+
+        task = asyncio.get_running_loop().create_task(requeue())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retrying": len(self._retries),
+            "connections_opened": self.pool.connections_opened,
+        }
+
+
+_mailer: Optional[Mailer] = None
+
+
+def get_mailer() -> Mailer:
+    """Return the worker's shared mailer, creating it on first use"""
+    global _mailer
+    if _mailer is None:
+        pool = SMTPConnectionPool(
+            settings.EMAIL_HOST,
+            settings.EMAIL_PORT,
+            settings.EMAIL_USER,
+            settings.EMAIL_PASS,
+            size=settings.EMAIL_POOL_SIZE,
+            use_tls=settings.EMAIL_USE_TLS,
+        )
+        _mailer = Mailer(
+            pool,
+            workers=settings.EMAIL_POOL_SIZE,
+            batch_size=settings.EMAIL_BATCH_SIZE,
+            max_retries=settings.EMAIL_MAX_RETRIES,
+            max_queue=settings.EMAIL_QUEUE_SIZE,
+        )
+    return _mailer
@@ -0,0 +1,37 @@
+from typing import Optional
+from cachetools import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+# firebase_uid -> detached User snapshot used by get_current_user
+_principals = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def get_principal(firebase_uid: str) -> Optional[User]:
+    """Return the cached principal for firebase_uid, if any"""
+    return _principals.get(firebase_uid)
+
+
+def cache_principal(user: User) -> User:
+    """Store a session-independent copy of user and return it"""
+    snapshot = User.model_validate(user.model_dump())
+    _principals[user.firebase_uid] = snapshot
+    return snapshot
+
+
+def invalidate_principal(firebase_uid: str):
+    """Forget the cached principal, e.g. after the user was updated or deactivated"""
+    _principals.pop(firebase_uid, None)
+
+
+def principal_from_claims(payload: dict) -> Optional[User]:
+    """Build a principal from the claims create_access_token embedded, or None if they're missing"""
+    if "is_active" not in payload or "user_id" not in payload:
+        return None
+    return User(
+        id=payload["user_id"],
+        firebase_uid=payload["sub"],
+        email=payload.get("email"),
+        is_active=payload["is_active"],
+        is_email_verified=payload.get("is_email_verified", False),
+    )
@@ -1,12 +1,253 @@
-from sqlmodel import Session
-from app.models.products import Product
+import base64
+import hashlib
+import re
+import sys
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import column, func, insert, literal_column, table, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.database import get_async_engine
+from app.models.products import SEARCH_CONFIG, Product
 
-def create_product(session: Session, name: str, price: str, image: str):
-    product = Product(name=name, price=price, image=image)
+# Sort keys clients may use; each must be the leading column of an index so pages are index range scans
+SORT_COLUMNS = {"id": Product.id, "name": Product.name, "price": Product.price_amount}
+PRODUCT_COLUMNS = (Product.id, Product.name, Product.price, Product.image, Product.price_amount, Product.currency, Product.url)
+STREAM_BATCH_SIZE = 1000
+MAX_SEARCH_TERMS = 8
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+product_fts = table("product_fts", column("rowid"), column("rank"))  # SQLite only, see app.models.products
+
+class ProductFilters(NamedTuple):
+    name_prefix: Optional[str] = None
+    min_price: Optional[Decimal] = None
+    max_price: Optional[Decimal] = None
+    currency: Optional[str] = None
+
+def create_product(session: Session, name: str, price: str, image: str,
+                   price_amount: Optional[Decimal] = None, currency: Optional[str] = None):
+    product = Product(name=name, price=price, image=image, price_amount=price_amount, currency=currency)
     session.add(product)
     session.commit()
     session.refresh(product)
     return product
 
-def get_products(session: Session):
-    return session.query(Product).all() 
\ No newline at end of file
+# Columns an upsert rewrites when a product's content hash changed
+UPSERT_COLUMNS = ("name", "price", "image", "price_amount", "currency", "url", "content_hash")
+EXISTING_LOOKUP_CHUNK = 1000
+
+def content_hash(row: dict) -> str:
+    content = "\x1f".join("" if row[name] is None else str(row[name]) for name in UPSERT_COLUMNS[:-1])
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+def _product_row(product: dict) -> Optional[dict]:
+    if not product.get("name") or not product.get("image") or product.get("price") is None:
+        return None
+    row = {
+        "name": product["name"],
+        "price": str(product["price"]),
+        "image": product["image"],
+        "price_amount": product.get("price_amount"),
+        "currency": product.get("currency"),
+        "url": product.get("url"),
+        "source_id": product.get("source_id"),
+    }
+    row["content_hash"] = content_hash(row)
+    return row
+
+def _existing_hashes(session: Session, source_ids: List[str]) -> Dict[str, Optional[str]]:
+    existing = {}
+    for start in range(0, len(source_ids), EXISTING_LOOKUP_CHUNK):
+        chunk = source_ids[start:start + EXISTING_LOOKUP_CHUNK]
+        existing.update(session.exec(select(Product.source_id, Product.content_hash).where(Product.source_id.in_(chunk))).all())
+    return existing
+
+def _upsert_statement(dialect: str):
+    """INSERT ... ON CONFLICT (source_id) DO UPDATE, only where the content hash differs (Postgres and SQLite)"""
+    statement = (postgresql_insert if dialect == "postgresql" else sqlite_insert)(Product)
+    return statement.on_conflict_do_update(
+        index_elements=[Product.source_id],
+        set_={name: statement.excluded[name] for name in UPSERT_COLUMNS},
+        where=Product.content_hash.is_distinct_from(statement.excluded.content_hash),
+    )
+
+def ingest_products(session: Session, products: Iterable[dict], seen: Optional[Set[str]] = None) -> Dict[str, int]:
+    """Save a page of parsed products in one transaction; returns inserted/updated/skipped counts.
+
+    Products are matched on source_id: new ones are inserted, ones whose content hash changed are
+    updated, and unchanged ones (or ones already in seen, which is updated) aren't written at all.
+    Writes go out as multi-row statements, batched by SQLAlchemy. Products missing a name, price or
+    image are skipped; ones without a source_id are always inserted.
+    """
+    seen = set() if seen is None else seen
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    keyed, unkeyed = {}, []
+    for row in map(_product_row, products):
+        if row is None or row["source_id"] in seen:
+            counts["skipped"] += 1
+        elif row["source_id"] is None:
+            unkeyed.append(row)
+        else:
+            seen.add(row["source_id"])
+            keyed[row["source_id"]] = row
+
+    existing = _existing_hashes(session, list(keyed))
+    changed = []
+    for source_id, row in keyed.items():
+        if source_id not in existing:
+            counts["inserted"] += 1
+        elif existing[source_id] != row["content_hash"]:
+            counts["updated"] += 1
+        else:
+            counts["skipped"] += 1
+            continue
+        changed.append(row)
+    counts["inserted"] += len(unkeyed)
+
+    if changed:
+        # The conflict clause also covers a concurrent job inserting the same product after the lookup
+        session.execute(_upsert_statement(session.get_bind().dialect.name), changed)
+    if unkeyed:
+        session.execute(insert(Product), unkeyed)
+    session.commit()
+    return counts
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+def dump_json(value) -> bytes:
+    """orjson with NUMERIC columns written as JSON numbers"""
+    return orjson.dumps(value, default=_json_default)
+
+def encode_cursor(values: list) -> str:
+    # Decimals go in as strings so the cursor round-trips without float rounding
+    return base64.urlsafe_b64encode(orjson.dumps(values, default=str)).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+def _parse_sort(sort: str):
+    descending = sort.startswith("-")
+    column = SORT_COLUMNS.get(sort.lstrip("-"))
+    if column is None:
+        allowed = ", ".join(f"{name}, -{name}" for name in SORT_COLUMNS)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"sort must be one of {allowed}")
+    return column, descending
+
+def _cursor_key(values: list, column):
+    if not isinstance(values[-1], int) or len(values) != (1 if column is Product.id else 2):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort")
+    if column is Product.id:
+        return Product.id, values[0]
+    if column is Product.price_amount:
+        try:
+            values = [Decimal(values[0]), values[1]]
+        except (InvalidOperation, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return tuple_(column, Product.id), tuple_(*values)
+
+def _apply_filters(statement, filters: ProductFilters):
+    if filters.name_prefix:
+        # The range lets the (name, id) index seek; startswith keeps the match exact
+        prefix = filters.name_prefix
+        statement = statement.where(Product.name >= prefix, Product.name.startswith(prefix, autoescape=True))
+        if ord(prefix[-1]) < sys.maxunicode:  # U+10FFFF has no next character to bound by
+            statement = statement.where(Product.name < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    if filters.min_price is not None:
+        statement = statement.where(Product.price_amount >= filters.min_price)
+    if filters.max_price is not None:
+        statement = statement.where(Product.price_amount <= filters.max_price)
+    if filters.currency:
+        statement = statement.where(Product.currency == filters.currency.upper())
+    return statement
+
+def product_query(sort: str = "id", cursor: Optional[str] = None, filters: ProductFilters = ProductFilters()):
+    """SELECT for one keyset page: rows strictly after the cursor in (sort column, id) order"""
+    column, descending = _parse_sort(sort)
+    statement = _apply_filters(select(*PRODUCT_COLUMNS), filters)
+    if column is Product.price_amount:
+        statement = statement.where(Product.price_amount.is_not(None))  # NULLs don't compare, so can't be paged past
+    if cursor:
+        key, after = _cursor_key(decode_cursor(cursor), column)
+        statement = statement.where(key < after if descending else key > after)
+    if column is Product.id:
+        order = [Product.id.desc() if descending else Product.id]
+    else:
+        order = [column.desc(), Product.id.desc()] if descending else [column, Product.id]
+    return statement.order_by(*order)
+
+def _cursor_for(row, sort: str) -> str:
+    column, _ = _parse_sort(sort)
+    return encode_cursor([row.id] if column is Product.id else [getattr(row, column.key), row.id])
+
+async def list_products(
+    session: AsyncSession, limit: int, sort: str = "id", cursor: Optional[str] = None,
+    filters: ProductFilters = ProductFilters()
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of products plus the cursor for the next page (None on the last page)"""
+    statement = product_query(sort, cursor, filters).limit(limit + 1)
+    rows = (await session.exec(statement)).all()
+    next_cursor = _cursor_for(rows[limit - 1], sort) if len(rows) > limit else None
+    return [row._asdict() for row in rows[:limit]], next_cursor
+
+def stream_products(
+    sort: str = "id", cursor: Optional[str] = None, filters: ProductFilters = ProductFilters()
+) -> AsyncIterator[bytes]:
+    """NDJSON for every matching product, read through a server-side cursor in batches.
+
+    The query is built (and validated) up front; rows are read with a session of its own
+    because the request's session is closed once a streaming response starts.
+    """
+    statement = product_query(sort, cursor, filters).execution_options(yield_per=STREAM_BATCH_SIZE)
+
+    async def lines():
+        async with AsyncSession(get_async_engine()) as session:
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                yield b"".join(dump_json(row._asdict()) + b"\n" for row in rows)
+
+    return lines()
+
+def _search_statement(dialect: str, terms: List[str]):
+    """Ranked match on name; every term must match, the last one as a prefix (search-as-you-type)"""
+    if dialect == "postgresql":
+        # Same expression as ix_product_name_search, so the GIN index is used
+        config = literal_column(f"'{SEARCH_CONFIG}'")
+        vector = func.to_tsvector(config, Product.name)
+        query = func.to_tsquery(config, " & ".join(terms[:-1] + [terms[-1] + ":*"]))
+        return select(*PRODUCT_COLUMNS).where(vector.op("@@")(query)).order_by(func.ts_rank(vector, query).desc(), Product.id)
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+        return (
+            select(*PRODUCT_COLUMNS)
+            .join(product_fts, product_fts.c.rowid == Product.id)
+            .where(literal_column("product_fts").op("MATCH")(match))
+            .order_by(product_fts.c.rank)  # rank alone lets FTS5 sort matches itself; a tiebreaker costs ~40%
+        )
+    # No full-text index: unranked substring scan
+    statement = select(*PRODUCT_COLUMNS)
+    for term in terms:
+        statement = statement.where(func.lower(Product.name).contains(term, autoescape=True))
+    return statement.order_by(Product.id)
+
+async def search_products(
+    session: AsyncSession, q: str, limit: int, filters: ProductFilters = ProductFilters()
+) -> List[dict]:
+    """Products whose name matches q, best match first"""
+    terms = SEARCH_TERM_PATTERN.findall(q.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return []
+    statement = _apply_filters(_search_statement(session.bind.dialect.name, terms), filters).limit(limit)
+    return [row._asdict() for row in (await session.exec(statement)).all()]
@@ -0,0 +1,181 @@
+import math
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, status
+from redis import RedisError
+from redis.asyncio import Redis
+from app.core.config import settings
+
+# Token bucket: refills `rate` tokens per second up to `capacity`, and takes up to
+# `requested` tokens at once so callers can lease a few for local use.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+local retry_after = 0
+if granted == 0 then retry_after = (1 - tokens) / rate end
+return {granted, tostring(retry_after)}
+"""
+
+REDIS_RETRY_SECONDS = 5.0  # how long to stay on local buckets after a Redis error
+
+
+class RateLimitRule(NamedTuple):
+    scope: str  # "ip", "email" or "uid"
+    limit: int
+    window: int  # seconds to refill the whole bucket
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window
+
+    def lease_size(self, fraction: float) -> int:
+        return max(1, int(self.limit * fraction))
+
+
+def parse_policy(policy: str) -> List[RateLimitRule]:
+    """Parse "ip=30/60;email=5/60" into rules (limit requests per window seconds, per key)"""
+    rules = []
+    for part in filter(None, (p.strip() for p in policy.split(";"))):
+        scope, _, spec = part.partition("=")
+        limit, _, window = spec.partition("/")
+        rules.append(RateLimitRule(scope.strip(), int(limit), int(window)))
+    return rules
+
+
+class RateLimiter:
+    """Token-bucket limiter shared across workers through Redis.
+
+    To skip most Redis round trips, a worker takes a small lease of tokens at once and
+    spends it locally, and remembers denied keys until their retry time. Keys that are
+    far under their limit therefore only reach Redis once per lease. Without Redis (or
+    while it is failing) the same buckets are kept in-process.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, str],
+        redis: Optional[Redis] = None,
+        lease_fraction: float = 0.1,
+        max_keys: int = 100000,
+        prefix: str = "ratelimit:"
+    ):
+        self.policies = {name: parse_policy(policy) for name, policy in policies.items()}
+        self.lease_fraction = lease_fraction
+        self.prefix = prefix
+        self._redis = redis
+        self._script = redis.register_script(TOKEN_BUCKET_LUA) if redis is not None else None
+        self._redis_down_until = 0.0
+        max_window = max((rule.window for rules in self.policies.values() for rule in rules), default=60)
+        # key -> [tokens, expires_at, blocked]: leased tokens, or a denial remembered until expires_at
+        self._leases = TTLCache(maxsize=max_keys, ttl=max_window)
+        # key -> [tokens, last_refill] when running without Redis
+        self._buckets = TTLCache(maxsize=max_keys, ttl=max_window)
+        self.local_hits = 0
+        self.redis_calls = 0
+        self.denied = 0
+
+    def _take_local(self, key: str, rule: RateLimitRule, now: float, requested: int) -> Tuple[int, float]:
+        tokens, ts = self._buckets.get(key, (rule.limit, now))
+        tokens = min(rule.limit, tokens + max(0.0, now - ts) * rule.rate)
+        granted = min(requested, math.floor(tokens))
+        tokens -= granted
+        self._buckets[key] = (tokens, now)
+        return granted, 0.0 if granted else (1 - tokens) / rule.rate
+
+    async def _take(self, key: str, rule: RateLimitRule, now: float, requested: int) -> Tuple[int, float]:
+        if self._script is None or now < self._redis_down_until:
+            return self._take_local(key, rule, now, requested)
+        self.redis_calls += 1
+        try:
+            granted, retry_after = await self._script(
+                keys=[key], args=[rule.limit, rule.rate, time.time(), requested, rule.window]
+            )
+        except (RedisError, OSError):
+            self._redis_down_until = now + REDIS_RETRY_SECONDS
+            return self._take_local(key, rule, now, requested)
+        return int(granted), float(retry_after)
+
+    async def _acquire(self, name: str, rule: RateLimitRule, identity: str) -> float:
+        """Take one token for identity; returns 0 when allowed, otherwise seconds to wait"""
+        key = f"{self.prefix}{name}:{rule.scope}:{identity}"
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None and now < lease[1]:
+            if lease[0] > 0:
+                lease[0] -= 1
+                self.local_hits += 1
+                return 0.0
+            if lease[0] == 0 and lease[2]:
+                self.local_hits += 1
+                return lease[1] - now
+        granted, retry_after = await self._take(key, rule, now, rule.lease_size(self.lease_fraction))
+        if not granted:
+            self._leases[key] = [0, now + retry_after, True]
+            return retry_after
+        if granted > 1:
+            # Unused leased tokens lapse after the time they took to accrue
+            self._leases[key] = [granted - 1, now + granted / rule.rate, False]
+        else:
+            self._leases.pop(key, None)
+        return 0.0
+
+    async def hit(self, name: str, ip: Optional[str] = None, email: Optional[str] = None, uid: Optional[str] = None):
+        """Count one request against policy `name`; raises 429 when any of its rules is exhausted"""
+        identities = {"ip": ip, "email": email.strip().lower() if email else None, "uid": uid}
+        wait = 0.0
+        for rule in self.policies.get(name, ()):
+            identity = identities.get(rule.scope)
+            if identity:
+                wait = max(wait, await self._acquire(name, rule, identity))
+        if wait > 0:
+            self.denied += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    async def check(self, name: str, request: Request, email: Optional[str] = None, uid: Optional[str] = None):
+        """hit() keyed by the request's client IP plus the given email / uid"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        await self.hit(name, ip=client_ip(request), email=email, uid=uid)
+
+    def stats(self) -> Dict[str, int]:
+        return {"local_hits": self.local_hits, "redis_calls": self.redis_calls, "denied": self.denied}
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_POLICIES,
+    redis=Redis.from_url(
+        settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+    ) if settings.RATE_LIMIT_REDIS else None,
+    lease_fraction=settings.RATE_LIMIT_LEASE_FRACTION
+)
+
+
+def get_rate_limiter() -> RateLimiter:
+    return rate_limiter
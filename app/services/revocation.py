@@ -0,0 +1,157 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from redis import RedisError
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.utils.bloom_filter import BloomFilter
+
+
+class RevocationList:
+    """Revoked access-token jtis, checked without a network hop for almost every request.
+
+    Redis holds the authoritative set (a sorted set scored by each token's own exp), plus
+    a log of the same jtis scored by revocation time. Each worker mirrors the set into a
+    Bloom filter, pulling newly logged entries every `sync_interval` seconds; only a Bloom
+    hit (a revoked token, or a rare false positive) is confirmed against Redis. Entries
+    past their exp can no longer match a valid token, so they are pruned and the filter
+    is rebuilt once per access-token lifetime.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        token_lifetime: int = 1800,
+        sync_interval: float = 5.0,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        key: str = "revoked_jti"
+    ):
+        self._redis = redis
+        self.token_lifetime = token_lifetime
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.key = key
+        self.log_key = f"{key}:log"
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._revoked: Dict[str, float] = {}  # jti -> exp, for revocations seen by this worker
+        self._synced_until = 0.0
+        self._rebuild_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.redis_checks = 0
+
+    async def revoke(self, jti: str, exp: Optional[float] = None):
+        """Revoke jti until exp, the token's own expiry (a full token lifetime from now if unknown)"""
+        now = time.time()
+        exp = exp if exp is not None else now + self.token_lifetime
+        self._revoked[jti] = exp
+        self._bloom.add(jti)
+        if self._redis is not None:
+            try:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.zadd(self.key, {jti: exp})
+                    pipe.zadd(self.log_key, {jti: now})
+                    await pipe.execute()
+            except RedisError:
+                pass
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        if jti in self._revoked:
+            return True
+        if self._redis is None:
+            return False  # every local revocation is in _revoked, so this is a false positive
+        self.redis_checks += 1
+        try:
+            exp = await self._redis.zscore(self.key, jti)
+        except RedisError:
+            return True  # can't tell a false positive from a revocation, so fail closed
+        if exp is not None:
+            self._revoked[jti] = exp
+        return exp is not None
+
+    async def sync(self):
+        """Pull revocations made by other workers; rebuild the filter once per token lifetime"""
+        now = time.time()
+        if now >= self._rebuild_at:
+            await self._rebuild(now)
+            return
+        if self._redis is None:
+            return
+        # Overlap by a second so entries written with a slightly skewed clock aren't missed
+        entries = await self._redis.zrangebyscore(self.log_key, self._synced_until - 1, "+inf", withscores=True)
+        self._synced_until = self._add_entries(self._bloom, entries, self._synced_until)
+
+    async def _rebuild(self, now: float):
+        """Replace the filter with one holding only revocations of tokens that haven't expired.
+
+        Everything is read from Redis before the new filter is built and swapped in with one
+        assignment, so requests never see a partial filter and a Redis error keeps the old one.
+        """
+        entries = []
+        if self._redis is not None:
+            await self._redis.zremrangebyscore(self.key, "-inf", now)
+            # The log only feeds sync(), whose cursor never trails the last rebuild by more than a lifetime
+            await self._redis.zremrangebyscore(self.log_key, "-inf", now - self.token_lifetime)
+            entries = await self._redis.zrangebyscore(self.key, now, "+inf", withscores=True)
+        # No awaits from here on; local revocations made during the reads above are included
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._add_entries(bloom, entries, now)
+        # Revocations logged after now are picked up by the next sync
+        self._bloom, self._synced_until = bloom, now
+        self._rebuild_at = now + self.token_lifetime
+
+    @staticmethod
+    def _add_entries(bloom: BloomFilter, entries, synced_until: float) -> float:
+        for jti, score in entries:
+            bloom.add(jti.decode() if isinstance(jti, bytes) else jti)
+            synced_until = max(synced_until, score)
+        return synced_until
+
+    async def _sync_forever(self):
+        while True:
+            try:
+                await self.sync()
+            except (RedisError, OSError):
+                self._rebuild_at = 0.0  # retry the full load once Redis is back
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._sync_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "bloom_entries": self._bloom.count,
+            "bloom_bytes": self._bloom.nbytes,
+            "local_revocations": len(self._revoked),
+            "redis_checks": self.redis_checks,
+        }
+
+
+revocation_list = RevocationList(
+    redis=Redis.from_url(
+        settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+    ) if settings.REVOCATION_REDIS else None,
+    token_lifetime=settings.JWT_EXPIRE_MINUTES * 60,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE
+)
+
+
+def get_revocation_list() -> RevocationList:
+    return revocation_list
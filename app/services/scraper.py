@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import httpx
+from app.core.config import settings
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER = 60.0  # seconds; longer Retry-After values are capped rather than stalling the job
+
+def with_page(url: str, page: int, param: str = "page") -> str:
+    """url with its page query parameter set (added if missing)"""
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != param]
+    query.append((param, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER)
+    except ValueError:
+        return None  # HTTP-date form; fall back to backoff
+
+class _Host:
+    """Per-host limits: at most `concurrency` requests in flight, starts spaced by `delay` seconds"""
+    __slots__ = ("semaphore", "lock", "next_start")
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+
+class Scraper:
+    """HTTP client for scrape jobs: one pooled HTTP/2 connection set, per-host concurrency and
+    politeness limits, retries with jittered exponential backoff on 429/5xx and network errors.
+
+    Use as `async with Scraper() as scraper:`; it belongs to the event loop that opened it.
+    """
+
+    def __init__(
+        self,
+        per_host_concurrency: int = settings.SCRAPER_PER_HOST_CONCURRENCY,
+        delay: float = settings.SCRAPER_DELAY,
+        max_retries: int = settings.SCRAPER_MAX_RETRIES,
+        backoff: float = settings.SCRAPER_BACKOFF,
+        max_pages: int = settings.SCRAPER_MAX_PAGES,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.delay = delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_pages = max_pages
+        self.client = httpx.AsyncClient(
+            http2=settings.SCRAPER_HTTP2,
+            timeout=settings.SCRAPER_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.SCRAPER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SCRAPER_MAX_CONNECTIONS
+            ),
+            headers={"User-Agent": settings.SCRAPER_USER_AGENT},
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._hosts: Dict[str, _Host] = {}
+        self.stats = {"requests": 0, "retries": 0}
+
+    async def __aenter__(self) -> "Scraper":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def _host(self, url: str) -> _Host:
+        host = urlsplit(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.per_host_concurrency)
+        return state
+
+    async def _wait_turn(self, host: _Host):
+        async with host.lock:
+            now = time.monotonic()
+            wait = host.next_start - now
+            host.next_start = max(now, host.next_start) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def stream(self, url: str) -> AsyncIterator[httpx.Response]:
+        """GET with retries, yielding the response before its body is read so it can be parsed as it arrives.
+
+        Retries happen on the status line, before any body is read. The host's concurrency slot is held
+        until the block exits. Raises httpx.HTTPStatusError / httpx.TransportError once retries run out.
+        """
+        host = self._host(url)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with host.semaphore:
+                await self._wait_turn(host)
+                self.stats["requests"] += 1
+                try:
+                    response = await self.client.send(self.client.build_request("GET", url), stream=True)
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        try:
+                            response.raise_for_status()
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    retry_after = _retry_after(response)
+                    await response.aclose()
+            self.stats["retries"] += 1
+            # Full jitter, so a burst of failures doesn't retry in lockstep; sleep outside the semaphore
+            await asyncio.sleep(retry_after if retry_after is not None else random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def get(self, url: str) -> httpx.Response:
+        """GET with retries, body read in full"""
+        async with self.stream(url) as response:
+            await response.aread()
+        return response
+
+    async def _products(self, url: str, parse: Callable[[httpx.Response], AsyncIterator[dict]]) -> AsyncIterator[dict]:
+        """parse's products for url; a body cut off mid-transfer is fetched again, skipping products already yielded"""
+        delivered = 0
+        for attempt in range(self.max_retries + 1):
+            async with self.stream(url) as response:
+                index = 0
+                try:
+                    async with aclosing(parse(response)) as products:
+                        async for product in products:
+                            index += 1
+                            if index > delivered:
+                                delivered = index
+                                yield product
+                    return
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+            self.stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def _page(self, url: str, parse, batch_size: int, batches: asyncio.Queue):
+        """Stream one page into batches; ends with None, or with the exception that stopped it"""
+        batch = []
+        try:
+            async with aclosing(self._products(url, parse)) as products:
+                async for product in products:
+                    batch.append(product)
+                    if len(batch) == batch_size:
+                        batches.put_nowait(batch)
+                        batch = []
+            if batch:
+                batches.put_nowait(batch)
+            batches.put_nowait(None)
+        except Exception as e:
+            batches.put_nowait(e)
+
+    async def paginate(
+        self,
+        url: str,
+        parse: Callable[[httpx.Response], AsyncIterator[dict]],
+        page_param: str = "page",
+        batch_size: int = settings.SCRAPER_BATCH_SIZE,
+    ) -> AsyncIterator[Tuple[int, List[dict]]]:
+        """(page number, up to batch_size products) in page order, until a page has no products (or 404s) or max_pages.
+
+        Each page's body is parsed as it streams in, and a batch is yielded as soon as it fills. Up to
+        per_host_concurrency pages are downloaded at once; products of pages the caller hasn't reached
+        yet wait in memory (never their bodies), and pages fetched past the last one are dropped.
+        """
+        first = int(dict(parse_qsl(urlsplit(url).query)).get(page_param) or 1)
+        last = first + self.max_pages - 1
+        pages: Dict[int, Tuple[asyncio.Task, asyncio.Queue]] = {}
+        next_page = first
+        try:
+            for number in range(first, last + 1):
+                while next_page <= min(number + self.per_host_concurrency - 1, last):
+                    batches = asyncio.Queue()
+                    task = asyncio.create_task(self._page(with_page(url, next_page, page_param), parse, batch_size, batches))
+                    pages[next_page] = (task, batches)
+                    next_page += 1
+                _, batches = pages[number]
+                empty = True
+                while (batch := await batches.get()) is not None:
+                    if isinstance(batch, Exception):
+                        if isinstance(batch, httpx.HTTPStatusError) and batch.response.status_code == 404 and number > first:
+                            break  # some sites 404 past the last page
+                        raise batch
+                    empty = False
+                    yield number, batch
+                del pages[number]
+                if empty:
+                    return
+        finally:
+            for task, _ in pages.values():
+                task.cancel()
+            await asyncio.gather(*(task for task, _ in pages.values()), return_exceptions=True)
@@ -0,0 +1,110 @@
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.models.user import User, RefreshToken
+from app.services.user_service import token_claims
+from app.utils.jwt_utils import create_access_token
+from app.utils.jwt_keys import get_key_ring
+
+
+def hash_refresh_token(token: str) -> str:
+    # Tokens are 256 random bits, so a fast hash is enough (nothing to brute-force)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_access_token(user: User) -> str:
+    key = get_key_ring().active
+    return create_access_token(
+        data=token_claims(user),
+        secret_key=key.signing_key,
+        algorithm=key.algorithm,
+        expires_delta=timedelta(minutes=settings.JWT_EXPIRE_MINUTES),
+        headers={"kid": key.kid} if key.kid else None
+    )
+
+
+async def new_refresh_token(session: AsyncSession, user: User, family_id: Optional[str] = None) -> str:
+    """Store the hash of a new refresh token for user and return the token (commits)"""
+    token = secrets.token_urlsafe(32)
+    session.add(RefreshToken(
+        token_hash=hash_refresh_token(token),
+        user_id=user.id,
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.now() + timedelta(days=settings.JWT_REFRESH_EXPIRE_DAYS)
+    ))
+    await session.commit()
+    return token
+
+
+async def issue_tokens(session: AsyncSession, user: User) -> Tuple[str, str]:
+    """Access token plus a refresh token starting a new rotation family"""
+    return new_access_token(user), await new_refresh_token(session, user)
+
+
+async def revoke_refresh_family(session: AsyncSession, family_id: str):
+    await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now())
+    )
+    await session.commit()
+
+
+async def revoke_user_refresh_tokens(session: AsyncSession, user_id: int):
+    """Revoke every refresh token of a user, e.g. after a password reset (doesn't commit)"""
+    await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now())
+    )
+
+
+async def rotate_refresh_token(
+    session: AsyncSession,
+    token: str,
+    before_rotate: Optional[Callable[[User], Awaitable[None]]] = None
+) -> Tuple[User, str, str]:
+    """Swap a refresh token for a new access/refresh pair without touching Firebase or bcrypt.
+
+    A token can be used once. Presenting an already-rotated token means it leaked, so the
+    whole family (every token descended from the same login) is revoked. before_rotate(user),
+    e.g. a per-user rate limit, runs before the token is used up, so if it raises the token
+    still works.
+    """
+    invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    statement = select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    stored = (await session.exec(statement)).first()
+    if stored is None or stored.expires_at <= datetime.now():
+        raise invalid
+    user = await session.get(User, stored.user_id)
+    if before_rotate is not None and user is not None:
+        await before_rotate(user)
+    # Conditional update, so two concurrent refreshes with the same token can't both win
+    result = await session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now())
+    )
+    if result.rowcount != 1:
+        await revoke_refresh_family(session, stored.family_id)
+        raise invalid
+    if user is None or not user.is_active:
+        await session.commit()
+        raise invalid
+    refresh_token = await new_refresh_token(session, user, stored.family_id)
+    return user, new_access_token(user), refresh_token
+
+
+async def revoke_refresh_token(session: AsyncSession, token: str):
+    """Log out a refresh token and every token rotated from the same login"""
+    statement = select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    stored = (await session.exec(statement)).first()
+    if stored is not None:
+        await revoke_refresh_family(session, stored.family_id)
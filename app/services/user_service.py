@@ -1,10 +1,58 @@
-from sqlmodel import Session, select
+from fastapi import HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
 from app.models.user import User, AuthProvider
+from app.services.principal_cache import invalidate_principal
 from typing import Optional
 
-def get_or_create_user(
-    session: Session,
+def token_claims(user: User) -> dict:
+    """Claims embedded in access tokens, enough for get_current_user to skip the DB"""
+    return {
+        "sub": user.firebase_uid,
+        "user_id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_email_verified": user.is_email_verified
+    }
+
+def _update_user(
+    user: User,
+    firebase_uid: str,
+    email: str,
+    display_name: Optional[str],
+    photo_url: Optional[str],
+    is_email_verified: bool,
+    password: Optional[str]
+) -> User:
+    user.firebase_uid = firebase_uid
+    user.email = email
+    user.display_name = display_name
+    user.photo_url = photo_url
+    user.is_email_verified = is_email_verified
+    if password:
+        user.password = password
+    user.updated_at = datetime.now()
+    return user
+
+async def _commit_user(session: AsyncSession, user: User) -> User:
+    """Commit user; a unique violation that survives our one retry is a 409"""
+    session.add(user)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email is already registered to another account"
+        )
+    await session.refresh(user)
+    return user
+
+async def get_or_create_user(
+    session: AsyncSession,
     firebase_uid: str,
     email: str,
     display_name: Optional[str] = None,
@@ -15,19 +63,12 @@ def get_or_create_user(
 ) -> User:
     """Get existing user or create new one"""
     statement = select(User).where(User.firebase_uid == firebase_uid)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
 
     if user:
-        user.email = email
-        user.display_name = display_name
-        user.photo_url = photo_url
-        user.is_email_verified = is_email_verified
-        if password:
-            user.password = password
-        user.updated_at = datetime.now()
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+        _update_user(user, firebase_uid, email, display_name, photo_url, is_email_verified, password)
+        user = await _commit_user(session, user)
+        invalidate_principal(firebase_uid)
         return user
     user = User(
         firebase_uid = firebase_uid,
@@ -39,6 +80,21 @@ def get_or_create_user(
         is_email_verified = is_email_verified
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
-    return user 
\ No newline at end of file
+    try:
+        await session.commit()
+    except IntegrityError:
+        # A concurrent first login created the row first, or the email belongs to a row with another
+        # firebase_uid; retry once by updating that row
+        await session.rollback()
+        statement = select(User).where(or_(User.firebase_uid == firebase_uid, User.email == email))
+        rows = (await session.exec(statement)).all()
+        user = next((row for row in rows if row.firebase_uid == firebase_uid), rows[0] if rows else None)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Could not create user, please retry")
+        previous_uid = user.firebase_uid
+        _update_user(user, firebase_uid, email, display_name, photo_url, is_email_verified, password)
+        user = await _commit_user(session, user)
+        invalidate_principal(previous_uid)
+        return user
+    await session.refresh(user)
+    return user
@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+from array import array
+from typing import Iterable, Optional
+
+
+def _normalize(domain: str) -> str:
+    return domain.strip().lower().rstrip(".")
+
+
+class DomainBlocklist:
+    """Immutable sorted domain set packed into one bytes blob, matching subdomains too.
+
+    Entries are stored label-reversed ("mailinator.com" -> "com.mailinator") so that
+    a domain and all of its parents share a prefix and sort next to each other.
+    """
+
+    def __init__(self, domains: Iterable[str]):
+        entries = sorted({
+            ".".join(reversed(domain.split(".")))
+            for domain in map(_normalize, domains)
+            if domain and not domain.startswith("#")
+        })
+        self._blob = "\n".join(entries).encode()
+        self._offsets = array("I")
+        position = 0
+        for entry in entries:
+            self._offsets.append(position)
+            position += len(entry.encode()) + 1
+        self._offsets.append(position)  # sentinel: end of the last entry + 1
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _entry(self, index: int) -> bytes:
+        return self._blob[self._offsets[index]:self._offsets[index + 1] - 1]
+
+    def _has(self, key: bytes) -> bool:
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self._entry(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low < len(self) and self._entry(low) == key
+
+    def __contains__(self, domain: str) -> bool:
+        labels = _normalize(domain).split(".")
+        labels.reverse()
+        # Check "com.mailinator", then "com.mailinator.sub", ... (never a bare TLD)
+        key = labels[0]
+        for label in labels[1:]:
+            key = f"{key}.{label}"
+            if self._has(key.encode()):
+                return True
+        return False
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the packed entries"""
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+    @classmethod
+    def from_file(cls, path: str) -> "DomainBlocklist":
+        with open(path, encoding="utf-8") as f:
+            return cls(f)
+
+
+class ReloadingBlocklist:
+    """DomainBlocklist backed by a file that is rebuilt in the background when its mtime changes"""
+
+    def __init__(self, path: str, check_interval: float = 60.0, fallback: Iterable[str] = ()):
+        self.path = path
+        self.check_interval = check_interval
+        self._current = DomainBlocklist(fallback)  # used until the file can be read
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+        self._next_check = time.monotonic() + check_interval
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> bool:
+        """Load the file if it changed; returns True when the list was swapped"""
+        with self._lock:
+            mtime = self._file_mtime()
+            if mtime is None or mtime == self._mtime:
+                return False
+            # Lookups keep using the old list until the new one is fully built
+            self._current = DomainBlocklist.from_file(self.path)
+            self._mtime = mtime
+        return True
+
+    def __contains__(self, domain: str) -> bool:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            mtime = self._file_mtime()
+            if mtime is not None and mtime != self._mtime and not self._lock.locked():
+                threading.Thread(target=self.reload, daemon=True).start()
+        return domain in self._current
+
+    def __len__(self) -> int:
+        return len(self._current)
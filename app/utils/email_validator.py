@@ -1,35 +1,177 @@
 import re
+import time
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
 import smtplib
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Iterable, List, Optional
 import asyncio
+import idna
+from cachetools import TLRUCache
+from app.utils.domain_blocklist import DomainBlocklist
 
-class EmailValidator:
-    def __init__(self):
-        # Common disposable email domains
-        self.disposable_domains = {
-            '10minutemail.com', 'tempmail.org', 'guerrillamail.com',
-            'mailinator.com', 'yopmail.com', 'throwaway.email'
+# Common disposable email domains, used when no blocklist is supplied
+DEFAULT_DISPOSABLE_DOMAINS = {
+    '10minutemail.com', 'tempmail.org', 'guerrillamail.com',
+    'mailinator.com', 'yopmail.com', 'throwaway.email'
+}
+
+# local@domain, with the domain's TLD either alphabetic or an IDNA "xn--" label
+EMAIL_PATTERN = re.compile(r'^([a-zA-Z0-9._%+-]+)@([a-zA-Z0-9.-]+\.(?:[a-zA-Z]{2,}|xn--[a-zA-Z0-9-]+))$')
+
+class MXResolver:
+    """Async MX lookups with a shared TTL-honoring cache, negative caching and request coalescing"""
+
+    def __init__(
+        self,
+        timeout: float = 3.0,
+        negative_ttl: int = 300,
+        max_ttl: int = 86400,
+        max_entries: int = 10000,
+        nameservers: Optional[List[str]] = None,
+        port: int = 53
+    ):
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        # Values are (has_mx, ttl); each entry expires after its own ttl
+        self._cache = TLRUCache(maxsize=max_entries, ttu=lambda _key, value, now: now + value[1], timer=time.monotonic)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+        if nameservers:
+            self._resolver.nameservers = nameservers
+            self._resolver.port = port
+        self._resolver.lifetime = timeout
+        self.lookups = 0
+
+    async def has_mx(self, domain: str) -> bool:
+        domain = domain.lower().rstrip(".")
+        cached = self._cache.get(domain)
+        if cached is not None:
+            return cached[0]
+        # Concurrent checks for the same domain share one query
+        future = self._inflight.get(domain)
+        if future is None:
+            future = asyncio.ensure_future(self._lookup(domain))
+            self._inflight[domain] = future
+            future.add_done_callback(lambda _f: self._inflight.pop(domain, None))
+        return await asyncio.shield(future)
+
+    async def _lookup(self, domain: str) -> bool:
+        self.lookups += 1
+        try:
+            answer = await self._resolver.resolve(domain, "MX")
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            self._cache[domain] = (False, self.negative_ttl)
+            return False
+        except (dns.exception.DNSException, OSError):
+            # Timeouts and SERVFAIL are transient, so don't remember them
+            return False
+        has_mx = len(answer) > 0
+        self._cache[domain] = (has_mx, min(max(answer.rrset.ttl, 1), self.max_ttl))
+        return has_mx
+
+
+class EmailCheck:
+    """Outcome of validating one address; the address is parsed once and shared by every check"""
+
+    __slots__ = ("email", "local", "domain", "format_valid", "not_disposable", "domain_valid", "message")
+
+    def __init__(self, email: str, local: str = "", domain: str = ""):
+        self.email = email
+        self.local = local
+        self.domain = domain  # lowercased, IDNA (punycode) form
+        self.format_valid = bool(domain)
+        self.not_disposable = True
+        self.domain_valid = False
+        self.message = "" if self.format_valid else "Invalid email format"
+
+    @property
+    def is_valid(self) -> bool:
+        return self.format_valid and self.not_disposable and self.domain_valid
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'is_valid': self.is_valid,
+            'format_valid': self.format_valid,
+            'domain_valid': self.domain_valid,
+            'not_disposable': self.not_disposable,
+            'message': self.message
         }
-    
+
+
+class EmailValidator:
+    def __init__(self, mx_resolver: Optional[MXResolver] = None, disposable_domains=None):
+        # Anything supporting `domain in ...`; DomainBlocklist also matches subdomains
+        if disposable_domains is None:
+            disposable_domains = DomainBlocklist(DEFAULT_DISPOSABLE_DOMAINS)
+        self.disposable_domains = disposable_domains
+        self.mx_resolver = mx_resolver or MXResolver()
+
+    def parse(self, email: str) -> EmailCheck:
+        """Split and normalize the address in one pass; format_valid is False if it doesn't parse"""
+        if not email.isascii():
+            # Internationalized domains are matched (and looked up) in their punycode form
+            local, _, domain = email.rpartition("@")
+            try:
+                email_ascii = f"{local}@{idna.encode(domain, uts46=True).decode()}"
+            except idna.IDNAError:
+                return EmailCheck(email)
+        else:
+            email_ascii = email
+        match = EMAIL_PATTERN.match(email_ascii)
+        if match is None:
+            return EmailCheck(email)
+        return EmailCheck(email, match.group(1), match.group(2).lower())
+
     def validate_email_format(self, email: str) -> bool:
         """Validate email format using regex"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
-    
+        return self.parse(email).format_valid
+
     def is_disposable_email(self, email: str) -> bool:
         """Check if email is from a disposable email service"""
-        domain = email.split('@')[1].lower()
-        return domain in self.disposable_domains
-    
+        check = self.parse(email)
+        return check.format_valid and check.domain in self.disposable_domains
+
     async def check_domain_mx_record(self, domain: str) -> bool:
         """Check if domain has valid MX records"""
-        try:
-            mx_records = dns.resolver.resolve(domain, 'MX')
-            return len(mx_records) > 0
-        except Exception:
+        return await self.mx_resolver.has_mx(domain)
+
+    def _check_offline(self, check: EmailCheck, disposable: Dict[str, bool]) -> bool:
+        """Format and disposable checks; returns True if the domain still needs an MX lookup"""
+        if not check.format_valid:
+            return False
+        if check.domain not in disposable:
+            disposable[check.domain] = check.domain in self.disposable_domains
+        if disposable[check.domain]:
+            check.not_disposable = False
+            check.message = 'Disposable email addresses are not allowed'
             return False
-    
+        return True
+
+    @staticmethod
+    def _finish(check: EmailCheck, domain_valid: bool):
+        check.domain_valid = domain_valid
+        check.message = 'Email is valid' if domain_valid else 'Invalid email domain'
+
+    async def validate(self, email: str) -> EmailCheck:
+        """Format, disposable and MX checks for one address, stopping at the first failure"""
+        check = self.parse(email)
+        if self._check_offline(check, {}):
+            self._finish(check, await self.check_domain_mx_record(check.domain))
+        return check
+
+    async def validate_many(self, emails: Iterable[str]) -> List[EmailCheck]:
+        """Validate a batch, checking each distinct domain once; results keep the input order"""
+        checks = [self.parse(email) for email in emails]
+        disposable: Dict[str, bool] = {}
+        pending = [check for check in checks if self._check_offline(check, disposable)]
+        domains = list({check.domain for check in pending})
+        found = await asyncio.gather(*(self.check_domain_mx_record(domain) for domain in domains))
+        has_mx = dict(zip(domains, found))
+        for check in pending:
+            self._finish(check, has_mx[check.domain])
+        return checks
+
     async def validate_email_existence(self, email: str) -> Dict[str, Any]:
         """
         Comprehensive email validation
@@ -41,36 +183,4 @@ class EmailValidator:
             'message': str
         }
         """
-        result = {
-            'is_valid': False,
-            'format_valid': False,
-            'domain_valid': False,
-            'not_disposable': True,
-            'message': ''
-        }
-        
-        # Check email format
-        if not self.validate_email_format(email):
-            result['message'] = 'Invalid email format'
-            return result
-        result['format_valid'] = True
-        
-        # Check if disposable email
-        if self.is_disposable_email(email):
-            result['not_disposable'] = False
-            result['message'] = 'Disposable email addresses are not allowed'
-            return result
-        
-        # Check domain MX records
-        domain = email.split('@')[1]
-        domain_valid = await self.check_domain_mx_record(domain)
-        result['domain_valid'] = domain_valid
-        
-        if not domain_valid:
-            result['message'] = 'Invalid email domain'
-            return result
-        
-        # All checks passed
-        result['is_valid'] = True
-        result['message'] = 'Email is valid'
-        return result
+        return (await self.validate(email)).as_dict()
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+ASYMMETRIC_ALGORITHMS = ("ES256", "EdDSA")
+
+
+class SigningKey(NamedTuple):
+    kid: Optional[str]
+    algorithm: str
+    signing_key: Any  # private key object or HMAC secret; None for verify-only keys
+    verifying_key: Any
+
+
+def _algorithm_for(key) -> str:
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if not isinstance(key.curve, ec.SECP256R1):
+            raise ValueError("EC keys must use P-256 for ES256")
+        return "ES256"
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"Unsupported key type {type(key).__name__}")
+
+
+def load_pem_key(kid: str, pem: bytes) -> SigningKey:
+    """Parse a PEM private key (sign + verify) or public key (verify only, e.g. a retired key)"""
+    if b"PRIVATE KEY" in pem:
+        private_key = serialization.load_pem_private_key(pem, password=None)
+        return SigningKey(kid, _algorithm_for(private_key), private_key, private_key.public_key())
+    public_key = serialization.load_pem_public_key(pem)
+    return SigningKey(kid, _algorithm_for(public_key), None, public_key)
+
+
+class KeyRing:
+    """JWT keys parsed once: one active signing key plus any others still accepted.
+
+    Tokens carry the signing key's id in the "kid" header, so keys can be rotated by
+    adding a new key, publishing it, switching the active kid, and dropping the old
+    key once tokens signed with it have expired.
+    """
+
+    def __init__(self, active: SigningKey, keys: Dict[Optional[str], SigningKey]):
+        self.active = active
+        self.keys = keys
+        self._jwks_body = json.dumps(self._jwks(), separators=(",", ":")).encode()
+        self.jwks_etag = '"' + hashlib.sha256(self._jwks_body).hexdigest()[:16] + '"'
+
+    @classmethod
+    def from_secret(cls, secret: str, algorithm: str = "HS256") -> "KeyRing":
+        key = SigningKey(None, algorithm, secret, secret)
+        return cls(key, {None: key})
+
+    @classmethod
+    def from_directory(cls, path: str, active_kid: Optional[str] = None) -> "KeyRing":
+        """Load every <kid>.pem in path; the active kid defaults to the last one by name"""
+        keys = {}
+        for file in sorted(Path(path).glob("*.pem")):
+            keys[file.stem] = load_pem_key(file.stem, file.read_bytes())
+        signable = [key for key in keys.values() if key.signing_key is not None]
+        if not signable:
+            raise ValueError(f"No private keys found in {path}")
+        active = keys[active_kid] if active_kid else signable[-1]
+        if active.signing_key is None:
+            raise ValueError(f"Active key {active.kid} has no private key")
+        return cls(active, keys)
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verify with the key named by the token's kid; raises jwt.InvalidTokenError"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("Unknown signing key")
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+    def _jwks(self) -> Dict[str, Any]:
+        entries = []
+        for key in self.keys.values():
+            if key.algorithm not in ASYMMETRIC_ALGORITHMS:
+                continue  # shared secrets are never published
+            converter = ECAlgorithm if key.algorithm == "ES256" else OKPAlgorithm
+            jwk = converter.to_jwk(key.verifying_key, as_dict=True)
+            jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+            entries.append(jwk)
+        return {"keys": entries}
+
+    @property
+    def jwks_body(self) -> bytes:
+        """Serialized JWKS document, built once"""
+        return self._jwks_body
+
+
+_key_ring: Optional[KeyRing] = None
+
+
+def get_key_ring() -> KeyRing:
+    """Worker-wide key ring, built from settings on first use (resources.startup warms it)"""
+    global _key_ring
+    if _key_ring is None:
+        from app.core.config import settings
+
+        if settings.JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS:
+            if not settings.JWT_KEYS_DIR:
+                raise ValueError(f"JWT_KEYS_DIR is required for {settings.JWT_ALGORITHM}")
+            _key_ring = KeyRing.from_directory(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+        else:
+            _key_ring = KeyRing.from_secret(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+    return _key_ring
+
+
+def generate_key(algorithm: str) -> bytes:
+    private_key = ec.generate_private_key(ec.SECP256R1()) if algorithm == "ES256" else ed25519.Ed25519PrivateKey.generate()
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+
+
+if __name__ == "__main__":
+    # python -m app.utils.jwt_keys ES256|EdDSA KEYS_DIR  -> writes KEYS_DIR/<kid>.pem
+    algorithm, directory = sys.argv[1], sys.argv[2]
+    kid = f"{time.strftime('%Y%m%d')}-{algorithm.lower()}-{os.urandom(3).hex()}"
+    os.makedirs(directory, exist_ok=True)
+    path = Path(directory) / f"{kid}.pem"
+    path.write_bytes(generate_key(algorithm))
+    os.chmod(path, 0o600)
+    print(f"Wrote {path} (kid {kid})")
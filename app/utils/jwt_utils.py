@@ -1,13 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import jwt
+import uuid
 from typing import Optional
 
-def create_access_token(data: dict, secret_key: str, algorithm: str, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, secret_key, algorithm: str, expires_delta: Optional[timedelta] = None, headers: Optional[dict] = None):
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now() + timedelta(minutes = 30)
+        expire = datetime.now(timezone.utc) + timedelta(minutes = 30)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
+    to_encode.setdefault("jti", uuid.uuid4().hex)  # lets a single token be revoked
+    # secret_key is an HMAC secret or a pre-parsed private key object (see jwt_keys.KeyRing)
+    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm, headers=headers)
     return encoded_jwt 
\ No newline at end of file
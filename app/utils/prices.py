@@ -0,0 +1,44 @@
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Tuple
+
+CENT = Decimal("0.01")
+MAX_AMOUNT = Decimal("9999999999.99")  # Product.price_amount is NUMERIC(12, 2)
+AMOUNT_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# Symbols and codes seen on the scraped sites; "Rs." is ambiguous (NPR, INR, PKR, LKR) so it uses the site default
+CURRENCY_MARKERS = (
+    ("₹", "INR"), ("inr", "INR"), ("npr", "NPR"), ("pkr", "PKR"), ("lkr", "LKR"),
+    ("৳", "BDT"), ("bdt", "BDT"), ("tk", "BDT"), ("us$", "USD"), ("usd", "USD"), ("$", "USD"),
+    ("€", "EUR"), ("eur", "EUR"), ("£", "GBP"), ("gbp", "GBP"),
+)
+
+
+def parse_price(value, default_currency: Optional[str] = None) -> Tuple[Optional[Decimal], Optional[str]]:
+    """Split a scraped price like "Rs. 1,299", "₹1,299 - ₹1,499" or 1299.0 into (amount, ISO currency).
+
+    The first number is the amount; returns (None, None) when there is none.
+    """
+    if value is None or isinstance(value, bool):
+        return None, None
+    if isinstance(value, (int, float, Decimal)):
+        text, number = None, str(value)
+    else:
+        text = str(value)
+        match = AMOUNT_PATTERN.search(text)
+        if match is None:
+            return None, None
+        number = match.group().replace(",", "")
+    try:
+        amount = Decimal(number).quantize(CENT)
+    except InvalidOperation:
+        return None, None
+    if not amount.is_finite() or amount > MAX_AMOUNT:
+        return None, None
+    currency = default_currency
+    if text:
+        lowered = text.lower()
+        for marker, code in CURRENCY_MARKERS:
+            if marker in lowered:
+                currency = code
+                break
+    return amount, currency
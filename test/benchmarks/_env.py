@@ -0,0 +1,30 @@
+"""Placeholder settings so benchmarks can import app modules without a real .env"""
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULTS = {
+    "DATABASE_URL": "sqlite:///bench.db",
+    "FIREBASE_SERVICE_ACCOUNT_PATH": "unused.json",
+    "JWT_SECRET_KEY": "bench",
+    "FIREBASE_API_KEY": "bench",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_USER": "",
+    "EMAIL_PASS": "",
+    "EMAIL_FROM": "bench@example.com",
+    "APP_NAME": "Bench",
+}
+
+
+def configure(**overrides):
+    """Set overrides, fill in anything else missing, and put the repo root on sys.path"""
+    for name, value in overrides.items():
+        os.environ[name] = str(value)
+    for name, value in DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
@@ -0,0 +1,91 @@
+"""
+Daraz catalog-response parsing: pages/second and peak Python allocations per page.
+
+- stdlib_json: response.json() then walking mods.listItems (what the jobs did)
+- orjson: orjson.loads of the whole response, same walk
+- ijson_stream: app.parsers.daraz, which decodes only mods.listItems entries as the body streams past
+
+Peak allocations are tracemalloc's peak while parsing one page, including the
+returned product dicts; the page body itself is allocated beforehand and not
+counted. Pages are the saved response in test/fixtures, and the same response
+with its list items and filters repeated --scale times, standing in for the
+larger responses of wide searches.
+
+    python test/benchmarks/bench_daraz_parser.py [--scale 10] [--seconds 2]
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from _env import configure
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def products_from(response_json: dict) -> list:
+    from app.utils.prices import parse_price
+
+    products = []
+    for item in response_json.get("mods", {}).get("listItems", []):
+        price_amount, currency = parse_price(item.get("price"), "NPR")
+        products.append({
+            "name": item.get("name"), "price": item.get("price"), "image": item.get("image"),
+            "price_amount": price_amount, "currency": currency, "source_id": f"daraz:{item.get('itemId')}",
+        })
+    return products
+
+
+def backends() -> dict:
+    import orjson
+    from app.parsers import daraz
+
+    return {
+        "stdlib_json": lambda body: products_from(json.loads(body)),
+        "orjson": lambda body: products_from(orjson.loads(body)),
+        "ijson_stream": lambda body: list(daraz.parse_products(body)),
+    }
+
+
+def measure(parse, body: bytes, seconds: float) -> dict:
+    products = parse(body)  # warm up imports and caches outside the traced run
+    tracemalloc.start()
+    parse(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    pages = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        parse(body)
+        pages += 1
+    return {
+        "products": len(products),
+        "pages_per_sec": round(pages / (time.perf_counter() - start), 1),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    from stub_shop import FIXTURES, daraz_page
+
+    page = daraz_page(json.loads((FIXTURES / "daraz_catalog.json").read_text()), 1)
+    mods = page["mods"]
+    large = {**page, "mods": {**mods, "listItems": mods["listItems"] * args.scale, "filter": [mods["filter"]] * args.scale}}
+    report = {}
+    for label, response in (("fixture_page", page), (f"scaled_x{args.scale}", large)):
+        body = json.dumps(response).encode()
+        report[label] = {"body_kb": round(len(body) / 1024, 1)}
+        for name, parse in backends().items():
+            report[label][name] = measure(parse, body, args.seconds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    configure()
+    run(args)
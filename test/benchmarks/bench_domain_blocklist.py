@@ -0,0 +1,98 @@
+"""
+Memory footprint and lookups/second of DomainBlocklist vs a plain set of
+domains (which can't match subdomains without extra work).
+
+Uses a synthetic list unless --file points at a real one. The set's memory
+figure excludes the domain strings it shares with the input list, so it
+understates what a standalone set would hold.
+
+    python test/benchmarks/bench_domain_blocklist.py [--domains 100000] [--lookups 200000] [--file list.txt]
+"""
+import argparse
+import json
+import random
+import string
+import time
+import tracemalloc
+
+from _env import configure
+
+configure()
+
+from app.utils.domain_blocklist import DomainBlocklist  # noqa: E402
+
+
+def synthetic_domains(count: int) -> list:
+    rng = random.Random(42)
+    tlds = ["com", "net", "org", "io", "xyz", "email"]
+    return [
+        "".join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(6, 14))) + "." + rng.choice(tlds)
+        for _ in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    build_s = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, build_s
+
+
+def lookups_per_sec(contains, queries: list) -> int:
+    start = time.perf_counter()
+    for query in queries:
+        contains(query)
+    return round(len(queries) / (time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--domains", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--file", default=None)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            domains = [line.strip().lower() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        domains = synthetic_domains(args.domains)
+
+    rng = random.Random(7)
+    # Mix of exact hits, subdomain hits and misses, like real signups
+    queries = []
+    for i in range(args.lookups):
+        kind = i % 3
+        if kind == 0:
+            queries.append(rng.choice(domains))
+        elif kind == 1:
+            queries.append("mail." + rng.choice(domains))
+        else:
+            queries.append(f"company{i}.com")
+
+    blocklist, blocklist_bytes, blocklist_build = measure(lambda: DomainBlocklist(domains))
+    plain, plain_bytes, plain_build = measure(lambda: set(domains))
+
+    print(json.dumps({
+        "domains": len(blocklist),
+        "lookups": len(queries),
+        "blocklist": {
+            "memory_mb": round(blocklist_bytes / 1e6, 2),
+            "build_ms": round(blocklist_build * 1000),
+            "lookups_per_sec": lookups_per_sec(blocklist.__contains__, queries),
+            "matches": sum(query in blocklist for query in queries),
+        },
+        "plain_set_exact_only": {
+            "memory_mb": round(plain_bytes / 1e6, 2),
+            "build_ms": round(plain_build * 1000),
+            "lookups_per_sec": lookups_per_sec(plain.__contains__, queries),
+            "matches": sum(query in plain for query in queries),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Render + MIME serialize cost per invitation email, as in a bulk invite campaign.
+
+    python test/benchmarks/bench_email_templates.py [--messages 5000]
+"""
+import argparse
+import json
+import time
+
+from _env import configure
+
+configure()
+
+from email.mime.multipart import MIMEMultipart  # noqa: E402
+from email.mime.text import MIMEText  # noqa: E402
+from app.services.email_templates import EmailTemplates  # noqa: E402
+
+
+def run(count: int) -> dict:
+    start = time.perf_counter()
+    templates = EmailTemplates("Bench")
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    render_s = serialize_s = 0.0
+    for i in range(count):
+        t0 = time.perf_counter()
+        rendered = templates.render(
+            "invitation",
+            email=f"user-{i}@example.com",
+            display_name=f"User {i}",
+            link=f"https://example.firebaseapp.com/__/auth/action?mode=signIn&oobCode={i:032x}",
+            expiry_minutes=60,
+        )
+        t1 = time.perf_counter()
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = rendered.subject
+        msg["From"] = "noreply@example.com"
+        msg["To"] = f"user-{i}@example.com"
+        msg.attach(MIMEText(rendered.text, "plain"))
+        msg.attach(MIMEText(rendered.html, "html"))
+        msg.as_string()
+        t2 = time.perf_counter()
+        render_s += t1 - t0
+        serialize_s += t2 - t1
+
+    return {
+        "messages": count,
+        "compile_ms": round(compile_ms, 2),
+        "render_us_per_message": round(render_s / count * 1e6, 1),
+        "serialize_us_per_message": round(serialize_s / count * 1e6, 1),
+        "messages_per_sec": round(count / (render_s + serialize_s)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=5000)
+    print(json.dumps(run(parser.parse_args().messages), indent=2))
@@ -0,0 +1,116 @@
+"""
+Flipkart search-page parsing: pages/second and peak memory per backend.
+
+- bs4_html_parser: BeautifulSoup(..., "html.parser") plus CSS selects per card (the old parser)
+- bs4_soupstrainer: BeautifulSoup on lxml, building only the product card subtrees
+- lxml_pull: app.parsers.flipkart, a pull parser with compiled XPaths that drops each card once yielded
+
+Each backend runs in its own process; peak memory is the growth of max RSS over
+the process's baseline after loading the corpus (tracemalloc can't see
+libxml2's allocations). The corpus is every *.html in --corpus, or by default
+the saved page in test/fixtures replayed as --pages distinct pages. The bs4
+backends are skipped when beautifulsoup4 isn't installed.
+
+    python test/benchmarks/bench_flipkart_parser.py [--corpus DIR] [--pages 50] [--seconds 3]
+"""
+import argparse
+import json
+import re
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from _env import configure
+
+BACKENDS = ("bs4_html_parser", "bs4_soupstrainer", "lxml_pull")
+
+
+def load_corpus(args) -> list:
+    if args.corpus:
+        return [path.read_bytes() for path in sorted(Path(args.corpus).glob("*.html"))]
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from stub_shop import FIXTURES, flipkart_page
+
+    fixture = (FIXTURES / "flipkart_search.html").read_text()
+    return [flipkart_page(fixture, page).encode() for page in range(1, args.pages + 1)]
+
+
+def parser_for(backend: str):
+    if backend == "lxml_pull":
+        from app.parsers import flipkart
+
+        return lambda page: sum(1 for _ in flipkart.parse_products(page))
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    def old(page):
+        soup = BeautifulSoup(page, "html.parser")
+        count = 0
+        for card in soup.select("div._1AtVbE"):
+            if card.select_one("div._4rR01T") and card.select_one("div._30jeq3") and card.select_one("img._396cs4"):
+                count += 1
+        return count
+
+    # A regex, since this bs4 version matches a plain class_ string against the whole class attribute
+    cards = SoupStrainer("div", attrs={"class": re.compile(r"(^| )_1AtVbE( |$)")})
+
+    def strained(page):
+        soup = BeautifulSoup(page, "lxml", parse_only=cards)
+        count = 0
+        for card in soup.find_all("div", class_="_1AtVbE"):
+            if card.find("div", class_="_4rR01T") and card.find("div", class_="_30jeq3") and card.find("img", class_="_396cs4"):
+                count += 1
+        return count
+
+    return old if backend == "bs4_html_parser" else strained
+
+
+def worker(args):
+    corpus = load_corpus(args)
+    parse = parser_for(args.worker)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pages = products = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        for page in corpus:
+            products += parse(page)
+            pages += 1
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "pages_per_sec": round(pages / elapsed, 1),
+        "products_per_page": round(products / pages, 1),
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024, 1),
+    }))
+
+
+def main(args):
+    corpus = load_corpus(args)
+    report = {"pages": len(corpus), "avg_page_kb": round(sum(map(len, corpus)) / len(corpus) / 1024, 1)}
+    for backend in BACKENDS:
+        if backend.startswith("bs4"):
+            try:
+                import bs4  # noqa: F401
+            except ImportError:
+                report[backend] = "skipped: pip install beautifulsoup4"
+                continue
+        command = [sys.executable, __file__, "--worker", backend, "--pages", str(args.pages), "--seconds", str(args.seconds)]
+        if args.corpus:
+            command += ["--corpus", args.corpus]
+        report[backend] = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=None, help="directory of saved Flipkart search pages")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    configure()
+    if args.worker:
+        worker(args)
+    else:
+        main(args)
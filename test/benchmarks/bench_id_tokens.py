@@ -0,0 +1,123 @@
+"""
+Tokens/second for FirebaseTokenVerifier against a locally generated key set.
+
+    python test/benchmarks/bench_id_tokens.py [--tokens 2000]
+"""
+import argparse
+import asyncio
+import datetime
+import http.server
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from app.services.firebase_tokens import FirebaseTokenVerifier  # noqa: E402
+
+PROJECT_ID = "bench-project"
+
+
+def make_key(kid: str):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def serve_certs(certs: dict) -> http.server.HTTPServer:
+    body = json.dumps(certs).encode()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        requests = 0
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            Handler.requests += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "public, max-age=21600")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    server.handler = Handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_tokens(keys: dict, count: int) -> list:
+    now = int(time.time())
+    kids = list(keys)
+    tokens = []
+    for i in range(count):
+        kid = kids[i % len(kids)]
+        claims = {
+            "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+            "aud": PROJECT_ID,
+            "sub": f"user-{i}",
+            "iat": now,
+            "auth_time": now,
+            "exp": now + 3600,
+        }
+        tokens.append(jwt.encode(claims, keys[kid], algorithm="RS256", headers={"kid": kid}))
+    return tokens
+
+
+async def run(count: int):
+    keys, certs = {}, {}
+    for kid in ("key-a", "key-b"):
+        keys[kid], certs[kid] = make_key(kid)
+    server = serve_certs(certs)
+    tokens = make_tokens(keys, count)
+    verifier = FirebaseTokenVerifier(
+        PROJECT_ID,
+        certs_url=f"http://127.0.0.1:{server.server_port}/certs",
+        cache_size=count,
+    )
+    await verifier.get_keys()
+
+    start = time.perf_counter()
+    for token in tokens:
+        await verifier.verify(token)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for token in tokens:
+        await verifier.verify(token)
+    warm = time.perf_counter() - start
+
+    print(json.dumps({
+        "tokens": count,
+        "signature_verify_per_sec": round(count / cold),
+        "memoized_per_sec": round(count / warm),
+        "cert_fetches": server.handler.requests,
+    }, indent=2))
+    await verifier.aclose()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=2000)
+    asyncio.run(run(parser.parse_args().tokens))
@@ -0,0 +1,82 @@
+"""
+Access-token encode/decode throughput per algorithm, with keys parsed once
+(as KeyRing does) vs passing PEM strings that PyJWT re-parses on every call.
+
+    python test/benchmarks/bench_jwt_signing.py [--seconds 1.0]
+"""
+import argparse
+import json
+import time
+
+from _env import configure
+
+configure()
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from app.utils.jwt_keys import KeyRing, generate_key, load_pem_key  # noqa: E402
+from app.utils.jwt_utils import create_access_token  # noqa: E402
+
+CLAIMS = {
+    "sub": "f0945c8e25a54530b0ed1be2bcce",
+    "user_id": 3,
+    "email": "user@example.com",
+    "is_active": True,
+    "is_email_verified": True,
+}
+
+
+def rate(func, seconds: float) -> int:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            func()
+        count += 50
+    return round(count / seconds)
+
+
+def bench_ring(ring: KeyRing, seconds: float) -> dict:
+    key = ring.active
+    headers = {"kid": key.kid} if key.kid else None
+
+    def encode():
+        return create_access_token(CLAIMS, key.signing_key, key.algorithm, headers=headers)
+
+    token = encode()
+    return {
+        "encode_per_sec": rate(encode, seconds),
+        "decode_per_sec": rate(lambda: ring.decode(token), seconds),
+        "token_bytes": len(token),
+    }
+
+
+def bench_pem_per_call(pem: bytes, algorithm: str, seconds: float) -> dict:
+    public_pem = serialization.load_pem_private_key(pem, password=None).public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    token = jwt.encode(CLAIMS, pem, algorithm=algorithm)
+    return {
+        "encode_per_sec": rate(lambda: jwt.encode(CLAIMS, pem, algorithm=algorithm), seconds),
+        "decode_per_sec": rate(lambda: jwt.decode(token, public_pem, algorithms=[algorithm]), seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent per measurement")
+    args = parser.parse_args()
+
+    results = {"HS256": bench_ring(KeyRing.from_secret("bench-secret-" + "x" * 32), args.seconds)}
+    for algorithm in ("ES256", "EdDSA"):
+        pem = generate_key(algorithm)
+        key = load_pem_key(f"bench-{algorithm.lower()}", pem)
+        results[algorithm] = {
+            "cached_keys": bench_ring(KeyRing(key, {key.kid: key}), args.seconds),
+            "pem_per_call": bench_pem_per_call(pem, algorithm, args.seconds),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
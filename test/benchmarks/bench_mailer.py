@@ -0,0 +1,91 @@
+"""
+Messages/second through the pooled Mailer vs one SMTP connection per message,
+against a local aiosmtpd sink (pip install aiosmtpd).
+
+    python test/benchmarks/bench_mailer.py [--messages 2000] [--pool 4] [--batch 20]
+"""
+import argparse
+import asyncio
+import json
+import smtplib
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+
+from _env import configure
+
+configure()
+
+
+class Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def make_message(i: int) -> MIMEMultipart:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = "Verify your email"
+    msg["From"] = "noreply@example.com"
+    msg["To"] = f"user-{i}@example.com"
+    msg.attach(MIMEText(f"<p>Hi user {i}, <a href='https://example.com/{i}'>verify</a></p>", "html"))
+    return msg
+
+
+def connection_per_message(host: str, port: int, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        msg = make_message(i)
+        with smtplib.SMTP(host, port) as server:
+            server.sendmail(msg["From"], [msg["To"]], msg.as_string())
+    return count / (time.perf_counter() - start)
+
+
+async def pooled(host: str, port: int, count: int, pool_size: int, batch: int) -> dict:
+    from app.services.mailer import Mailer, SMTPConnectionPool
+
+    pool = SMTPConnectionPool(host, port, size=pool_size, use_tls=False)
+    mailer = Mailer(pool, workers=pool_size, batch_size=batch, max_queue=count)
+    start = time.perf_counter()
+    for i in range(count):
+        mailer.send(make_message(i))
+    enqueued = time.perf_counter() - start
+    await mailer.stop(drain=True, timeout=300)
+    elapsed = time.perf_counter() - start
+    return {
+        "messages_per_sec": round(count / elapsed),
+        "enqueue_us_per_message": round(enqueued / count * 1e6, 1),
+        "connections_opened": pool.connections_opened,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=8025)
+    controller.start()
+    try:
+        baseline = connection_per_message("127.0.0.1", 8025, args.messages)
+        result = asyncio.run(pooled("127.0.0.1", 8025, args.messages, args.pool, args.batch))
+    finally:
+        controller.stop()
+    print(json.dumps({
+        "messages": args.messages,
+        "connection_per_message_per_sec": round(baseline),
+        "pooled": result,
+        "received": sink.received,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+MXResolver against test/stub_dns.py: cache hits, negative caching and
+coalescing of concurrent lookups for the same domain.
+
+    python test/benchmarks/bench_mx_lookups.py [--checks 5000] [--domains 20] [--delay 0.02]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from _env import configure
+
+configure()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from stub_dns import StubDNSServer  # noqa: E402
+from app.utils.email_validator import MXResolver  # noqa: E402
+
+
+async def run(args) -> dict:
+    good = [f"company{i}.test" for i in range(args.domains)]
+    bad = [f"missing{i}.test" for i in range(args.domains)]
+    server = StubDNSServer(port=0, mx_domains=good, no_mx_domains=[], delay=args.delay).start()
+    resolver = MXResolver(timeout=2.0, nameservers=["127.0.0.1"], port=server.port)
+    domains = good + bad
+
+    start = time.perf_counter()
+    cold = await asyncio.gather(*(resolver.has_mx(domains[i % len(domains)]) for i in range(args.checks)))
+    cold_s = time.perf_counter() - start
+    cold_queries = server.queries
+
+    start = time.perf_counter()
+    await asyncio.gather(*(resolver.has_mx(domains[i % len(domains)]) for i in range(args.checks)))
+    warm_s = time.perf_counter() - start
+
+    server.stop()
+    return {
+        "checks": args.checks,
+        "distinct_domains": len(domains),
+        "valid": sum(cold),
+        "dns_queries_cold": cold_queries,
+        "dns_queries_warm": server.queries - cold_queries,
+        "cold_checks_per_sec": round(args.checks / cold_s),
+        "warm_checks_per_sec": round(args.checks / warm_s),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--domains", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="simulated DNS latency in seconds")
+    print(json.dumps(asyncio.run(run(parser.parse_args())), indent=2))
@@ -0,0 +1,82 @@
+"""
+Rows/second for saving one scraped batch: create_product per item (INSERT,
+COMMIT and SELECT per row, what the scrape jobs did) vs ingest_products
+(multi-row upserts in one transaction), then re-scraping the same batch with
+nothing changed and with 10% of prices changed.
+
+Runs against a throwaway SQLite file unless --url points at a local Postgres
+(the benchmark rows are left in its product table).
+
+    python test/benchmarks/bench_product_ingest.py [--items 10000] [--rounds 3]
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from _env import configure
+
+
+def scraped_batch(rng: random.Random, count: int) -> list:
+    products = []
+    for i in range(count):
+        amount = rng.randint(100, 99999)
+        products.append({
+            "name": f"Scraped product {rng.getrandbits(48):x} {i}",
+            "price": f"Rs. {amount:,}",
+            "image": f"https://example.com/img/{i}.jpg",
+            "price_amount": Decimal(amount),
+            "currency": "NPR",
+            "source_id": f"bench:{rng.getrandbits(64):x}",
+        })
+    return products
+
+
+def main(args):
+    from sqlmodel import Session
+    from app.core.database import engine, create_db_and_tables
+    from app.services.products_service import create_product, ingest_products
+
+    def per_row(session, products):
+        for product in products:
+            create_product(
+                session, product["name"], product["price"], product["image"], product["price_amount"], product["currency"]
+            )
+
+    rng = random.Random(1)
+    create_db_and_tables()
+    report = {"database": engine.url.render_as_string(hide_password=True), "items": args.items}
+    for label, save in (("create_product_per_row", per_row), ("ingest_products", ingest_products)):
+        best = 0
+        for _ in range(args.rounds):
+            products = scraped_batch(rng, args.items)
+            with Session(engine) as session:
+                start = time.perf_counter()
+                save(session, products)
+                best = max(best, args.items / (time.perf_counter() - start))
+        report[f"{label}_rows_per_sec"] = round(best)
+    report["speedup"] = round(report["ingest_products_rows_per_sec"] / report["create_product_per_row_rows_per_sec"], 1)
+
+    # Hourly re-scrape of the last batch: only changed rows should be written
+    for label, changed_share in (("rescrape_unchanged", 0), ("rescrape_10pct_changed", 0.1)):
+        for product in rng.sample(products, int(len(products) * changed_share)):
+            product["price_amount"] += 1
+            product["price"] = f"Rs. {product['price_amount']:,}"
+        with Session(engine) as session:
+            start = time.perf_counter()
+            counts = ingest_products(session, products)
+            report[label] = {"rows_per_sec": round(args.items / (time.perf_counter() - start)), **counts}
+    print(json.dumps(report, indent=2))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    configure(DATABASE_URL=args.url or f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    main(args)
@@ -0,0 +1,139 @@
+"""
+GET /api/products at catalog scale: loading the whole table (what get_products
+did) vs one keyset page vs the same page via OFFSET, at the start, middle and
+end of the table, plus NDJSON streaming throughput and peak memory.
+
+Seeds a throwaway SQLite file unless --url points at a local Postgres whose
+product table may be wiped.
+
+    python test/benchmarks/bench_product_listing.py [--rows 1000000] [--limit 50] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+
+from _env import configure
+
+WORDS = ("Apple", "Bamboo", "Cotton", "Denim", "Electric", "Folding", "Garden", "Hiking", "Iron", "Jute",
+         "Kitchen", "Leather", "Marble", "Nylon", "Office", "Plastic", "Quartz", "Rubber", "Steel", "Travel")
+CURRENCIES = ("NPR", "INR")
+
+
+def seed(engine, rows: int):
+    from sqlalchemy import text
+
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM product"))
+        for start in range(0, rows, 50000):
+            batch = []
+            for i in range(start, min(start + 50000, rows)):
+                amount = rng.randint(100, 99999)
+                batch.append({
+                    "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", "price": f"Rs. {amount:,}",
+                    "image": f"https://example.com/img/{i}.jpg", "price_amount": amount, "currency": rng.choice(CURRENCIES),
+                })
+            conn.execute(
+                text(
+                    "INSERT INTO product (name, price, image, price_amount, currency) "
+                    "VALUES (:name, :price, :image, :price_amount, :currency)"
+                ),
+                batch
+            )
+
+
+async def best_of(func, repeat: int) -> float:
+    """Fastest of repeat runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+async def run(args):
+    from sqlmodel import Session, select
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.core.database import engine, get_async_engine, create_db_and_tables, dispose_engines
+    from app.models.products import Product
+    from app.services import products_service
+
+    create_db_and_tables()
+    start = time.perf_counter()
+    seed(engine, args.rows)
+    seed_seconds = round(time.perf_counter() - start, 1)
+
+    def load_all():
+        with Session(engine) as session:
+            return session.exec(select(Product)).all()
+
+    start = time.perf_counter()
+    count = len(await asyncio.to_thread(load_all))
+    full_table_seconds = round(time.perf_counter() - start, 2)
+
+    report = {
+        "database": engine.url.render_as_string(hide_password=True),
+        "rows": count,
+        "seed_seconds": seed_seconds,
+        "full_table_load_seconds": full_table_seconds,
+        "page_ms": {},
+    }
+    async with AsyncSession(get_async_engine()) as session:
+        for sort in ("id", "name", "-name"):
+            for label, position in (("first", 0), ("middle", count // 2), ("last", count - args.limit)):
+                statement = products_service.product_query(sort)
+                cursor = None
+                if position:
+                    # Cursor for the row just before the page, as the previous page would have returned
+                    row = (await session.exec(statement.offset(position - 1).limit(1))).one()
+                    cursor = products_service._cursor_for(row, sort)
+
+                async def keyset():
+                    await products_service.list_products(session, args.limit, sort, cursor)
+
+                async def offset():
+                    (await session.exec(statement.offset(position).limit(args.limit + 1))).all()
+
+                report["page_ms"][f"{sort}/{label}"] = {
+                    "keyset": await best_of(keyset, args.repeat),
+                    "offset": await best_of(offset, args.repeat),
+                }
+
+    async def stream():
+        size = 0
+        async for chunk in products_service.stream_products():
+            size += len(chunk)
+        return size
+
+    start = time.perf_counter()
+    size = await stream()
+    elapsed = time.perf_counter() - start
+    report["ndjson_stream"] = {"rows_per_sec": round(count / elapsed), "mbytes": round(size / 1e6, 1)}
+
+    # Peak Python allocations, measured in separate passes since tracemalloc slows everything down
+    tracemalloc.start()
+    await stream()
+    report["ndjson_stream"]["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+    tracemalloc.reset_peak()
+    await asyncio.to_thread(load_all)
+    report["full_table_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 1)
+    tracemalloc.stop()
+
+    print(json.dumps(report, indent=2))
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    configure(DATABASE_URL=args.url or f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    asyncio.run(run(args))
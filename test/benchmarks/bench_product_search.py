@@ -0,0 +1,106 @@
+"""
+/api/products/search latency on a synthetic catalog: brand + adjective + noun
+names, so terms range from rare (a noun, ~0.1% of rows) to common (a brand,
+~1%), plus prefix and price-range queries. Reports the median and worst of
+--repeat runs per query.
+
+Seeds a throwaway SQLite file (FTS5) unless --url points at a local Postgres
+whose product table may be wiped.
+
+    python test/benchmarks/bench_product_search.py [--rows 1000000] [--limit 50] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from decimal import Decimal
+
+from _env import configure
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "te", "so", "vu", "ne", "zi", "po", "da", "fe", "gu", "hi", "ju", "be")
+
+
+def vocabulary(rng: random.Random, size: int, syllables: int) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(syllables)))
+    return sorted(words)
+
+
+def seed(engine, rows: int, rng: random.Random):
+    from sqlalchemy import text
+
+    brands, adjectives, nouns = vocabulary(rng, 100, 3), vocabulary(rng, 500, 4), vocabulary(rng, 1000, 5)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM product"))
+        for start in range(0, rows, 50000):
+            batch = []
+            for i in range(start, min(start + 50000, rows)):
+                amount = rng.randint(100, 99999)
+                batch.append({
+                    "name": f"{rng.choice(brands).title()} {rng.choice(adjectives)} {rng.choice(nouns)} {i:x}",
+                    "price": f"Rs. {amount:,}", "image": f"https://example.com/img/{i}.jpg",
+                    "price_amount": amount, "currency": "NPR",
+                })
+            conn.execute(
+                text(
+                    "INSERT INTO product (name, price, image, price_amount, currency) "
+                    "VALUES (:name, :price, :image, :price_amount, :currency)"
+                ),
+                batch
+            )
+    return brands, adjectives, nouns
+
+
+async def run(args):
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.core.database import engine, get_async_engine, create_db_and_tables, dispose_engines
+    from app.services.products_service import ProductFilters, search_products
+
+    rng = random.Random(7)
+    create_db_and_tables()
+    start = time.perf_counter()
+    brands, adjectives, nouns = seed(engine, args.rows, rng)
+    seed_seconds = round(time.perf_counter() - start, 1)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE product")
+
+    queries = {
+        "rare term": (lambda: rng.choice(nouns), ProductFilters()),
+        "common term": (lambda: rng.choice(brands), ProductFilters()),
+        "two terms": (lambda: f"{rng.choice(brands)} {rng.choice(adjectives)}", ProductFilters()),
+        "prefix as typed": (lambda: f"{rng.choice(brands)} {rng.choice(nouns)[:3]}", ProductFilters()),
+        "rare term + price range": (lambda: rng.choice(nouns), ProductFilters(min_price=Decimal(1000), max_price=Decimal(5000))),
+    }
+    report = {"database": engine.url.render_as_string(hide_password=True), "rows": args.rows, "seed_seconds": seed_seconds}
+    async with AsyncSession(get_async_engine()) as session:
+        for label, (make_query, filters) in queries.items():
+            timings, hits = [], 0
+            for _ in range(args.repeat):
+                q = make_query()
+                start = time.perf_counter()
+                results = await search_products(session, q, args.limit, filters)
+                timings.append((time.perf_counter() - start) * 1000)
+                hits += len(results)
+            report[label] = {
+                "median_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "avg_results": round(hits / args.repeat, 1),
+            }
+    print(json.dumps(report, indent=2))
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    configure(DATABASE_URL=args.url or f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    asyncio.run(run(args))
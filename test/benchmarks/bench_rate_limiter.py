@@ -0,0 +1,80 @@
+"""
+Per-request overhead of RateLimiter for the email-login policy: in-process
+buckets only, Redis with one token per call, and Redis with local leases.
+
+Redis is fakeredis (pip install "fakeredis[lua]") unless --redis-url is
+given; with fakeredis there is no network, so also compare redis_calls per
+request, each of which costs a round trip against a real server.
+
+    python test/benchmarks/bench_rate_limiter.py [--requests 20000] [--clients 200] [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from _env import configure
+
+configure()
+
+from fastapi import HTTPException  # noqa: E402
+from redis.asyncio import Redis  # noqa: E402
+from app.services.rate_limiter import RateLimiter  # noqa: E402
+
+POLICY = {"email-login": "ip=1000/60;email=100/60"}
+
+
+def make_redis(url):
+    if url:
+        return Redis.from_url(url)
+    import fakeredis
+    return fakeredis.FakeAsyncRedis()
+
+
+async def run_mode(limiter: RateLimiter, requests: int, clients: int) -> dict:
+    denied = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        client = i % clients
+        try:
+            await limiter.hit("email-login", ip=f"10.0.{client // 250}.{client % 250}", email=f"user{client}@example.com")
+        except HTTPException:
+            denied += 1
+    elapsed = time.perf_counter() - start
+    redis_calls = limiter.redis_calls
+    # One attacker hammering a single account: denials should be answered locally
+    start = time.perf_counter()
+    attack_denied = 0
+    for _ in range(requests // 10):
+        try:
+            await limiter.hit("email-login", ip="203.0.113.9", email="victim@example.com")
+        except HTTPException:
+            attack_denied += 1
+    attack_elapsed = time.perf_counter() - start
+    return {
+        "us_per_request": round(elapsed / requests * 1e6, 1),
+        "redis_calls_per_request": round(redis_calls / requests, 3),
+        "denied": denied,
+        "attack_us_per_request": round(attack_elapsed / (requests // 10) * 1e6, 1),
+        "attack_denied": attack_denied,
+    }
+
+
+async def main(args):
+    results = {}
+    results["local_only"] = await run_mode(RateLimiter(POLICY), args.requests, args.clients)
+    for name, fraction in (("redis_no_lease", 0.0), ("redis_leased", 0.1)):
+        redis = make_redis(args.redis_url)
+        await redis.flushdb()
+        limiter = RateLimiter(POLICY, redis=redis, lease_fraction=fraction)
+        results[name] = await run_mode(limiter, args.requests, args.clients)
+        await limiter.aclose()
+    print(json.dumps({"requests": args.requests, "clients": args.clients, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--redis-url", default=None, help="real Redis to use instead of fakeredis (it is flushed)")
+    asyncio.run(main(parser.parse_args()))
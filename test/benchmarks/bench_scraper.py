@@ -0,0 +1,85 @@
+"""
+Scrape throughput against test/stub_shop.py, which replays the saved Daraz
+pages with --latency seconds of server delay per request:
+
+- requests.get per page without a session, one page at a time (what the jobs did)
+- Scraper.paginate with per-host concurrency and connection reuse
+- the same with --fail-rate of requests answered 429/503, which must still deliver every page
+- scrape_pages end to end into a throwaway SQLite file, run twice to show the re-scrape is all skips
+
+    python test/benchmarks/bench_scraper.py [--pages 25] [--latency 0.05] [--concurrency 4] [--fail-rate 0.2]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _env import configure
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+async def run(args):
+    import requests
+    from stub_shop import StubShop
+    from app.core.database import create_db_and_tables
+    from app.parsers import daraz
+    from app.redis_queue.jobs import scrape_pages
+    from app.services.scraper import Scraper, with_page
+
+    shop = StubShop(0, args.pages, latency=args.latency).start()
+    url = shop.url("daraz")
+    report = {"pages": args.pages, "server_latency_seconds": args.latency}
+
+    def legacy():
+        count = 0
+        for page in range(1, args.pages + 2):
+            if not list(daraz.parse_products(requests.get(with_page(url, page)).content)):
+                break
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    pages = await asyncio.to_thread(legacy)
+    report["requests_per_page"] = {"pages": pages, "pages_per_sec": round(pages / (time.perf_counter() - start), 1)}
+
+    async def engine(label: str, **options):
+        scraper = Scraper(per_host_concurrency=args.concurrency, delay=0, **options)
+        async with scraper:
+            start = time.perf_counter()
+            pages, products = set(), 0
+            async for page, batch in scraper.paginate(url, daraz.parse_response):
+                pages.add(page)
+                products += len(batch)
+            report[label] = {
+                "pages": len(pages), "products": products,
+                "pages_per_sec": round(len(pages) / (time.perf_counter() - start), 1), **scraper.stats,
+            }
+
+    await engine("scraper")
+    shop.fail_rate = args.fail_rate
+    await engine("scraper_with_failures", backoff=0.05)
+    shop.fail_rate = 0
+
+    create_db_and_tables()
+    for label in ("job_first_run", "job_rescrape"):
+        start = time.perf_counter()
+        counts = await scrape_pages(url, daraz.parse_response, Scraper(per_host_concurrency=args.concurrency, delay=0))
+        report[label] = {"seconds": round(time.perf_counter() - start, 2), **counts}
+
+    shop.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fail-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    configure(DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+    asyncio.run(run(args))
@@ -0,0 +1,76 @@
+"""
+Cold-start cost of importing app.main and running its lifespan startup.
+
+Each run is a fresh interpreter, so module caches don't hide import time.
+
+    python test/benchmarks/bench_startup.py [--runs 10] [--top 15]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from _env import ROOT, configure
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+"""
+
+STARTUP_SNIPPET = """
+import asyncio, time
+import app.main
+from app.core.resources import resources
+start = time.perf_counter()
+asyncio.run(resources.startup())
+print(time.perf_counter() - start)
+"""
+
+
+def timed(snippet: str, runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(top: int) -> list:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | module"
+        self_us, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        rows.append((int(cumulative_us), name))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in rows[:top]]
+
+
+def summarize(samples: list) -> dict:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--with-startup", action="store_true", help="also time resources.startup() (needs a reachable DB)")
+    args = parser.parse_args()
+    configure()
+    report = {"import_app_main": summarize(timed(IMPORT_SNIPPET, args.runs))}
+    if args.with_startup:
+        report["lifespan_startup"] = summarize(timed(STARTUP_SNIPPET, args.runs))
+    report["slowest_imports"] = slowest_imports(args.top)
+    print(json.dumps(report, indent=2))
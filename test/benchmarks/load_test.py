@@ -0,0 +1,415 @@
+"""
+Load test for the auth and products APIs.
+
+Boots app.main:app under uvicorn against SQLite (or --database-url, e.g. a
+local Postgres) with every external service stubbed out in a side process:
+Firebase Auth (test/stub_firebase.py), SMTP (test/stub_smtp.py), DNS for MX
+checks (test/stub_dns.py) and Redis (fakeredis over TCP). It then seeds users
+and products, drives a weighted traffic mix at fixed concurrency and prints
+throughput and p50/p95/p99 latency per endpoint as JSON.
+
+    python test/benchmarks/load_test.py [--mix mixed] [--concurrency 32] [--duration 20]
+        [--users 100] [--products 1000] [--database-url URL] [--app-workers 1]
+        [--output results.json] [--compare previous.json]
+
+--mix is a preset (see MIXES) or weights like "login=3,products=1".
+"login-storm" is every worker logging in as a few users (try --users 5) while
+the mix's other scenarios run as an open-loop probe at --probe-rate requests/s:
+it saturates the bcrypt pool, so expect 503s once PASSWORD_HASH_MAX_PENDING is
+reached. The probe is then rerun alone at the same rate, and "probe_p99_ms"
+puts its p99 with and without the storm side by side.
+Save --output per commit and pass it to --compare on the next run.
+Needs: pip install "fakeredis[lua]"
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "test"))
+
+PASSWORD = "load-test-password"
+PROJECT_ID = "demo-project"
+MIXES = {
+    "mixed": "register=1,login=4,google=2,refresh=3,products=4",
+    "auth": "register=1,login=4,google=2,refresh=3",
+    "login-storm": "login=20,products=1",
+    "products": "products=1",
+}
+SCENARIOS = ("register", "login", "google", "refresh", "products")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(value: str) -> dict:
+    weights = {}
+    for part in MIXES.get(value, value).split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def run_stubs(ports: dict, ready):
+    """Side process for every fake dependency, so they don't compete with the load generator for the GIL"""
+    import threading
+    import fakeredis
+    import stub_firebase
+    from stub_dns import StubDNSServer
+    from stub_smtp import SMTPSink
+
+    firebase = stub_firebase.serve(ports["firebase"])
+    threading.Thread(target=firebase.serve_forever, daemon=True).start()
+    SMTPSink(ports["smtp"]).start()
+    StubDNSServer(ports["dns"], mx_domains={"example.com"}, no_mx_domains=()).start()
+    redis = fakeredis.TcpFakeServer(("127.0.0.1", ports["redis"]), server_type="redis")
+    threading.Thread(target=redis.serve_forever, daemon=True).start()
+    ready.set()
+    while True:
+        time.sleep(3600)
+
+
+def write_service_account(path: Path):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    path.write_text(json.dumps({
+        "type": "service_account",
+        "project_id": PROJECT_ID,
+        "private_key_id": "load-test",
+        "private_key": pem.decode(),
+        "client_email": f"load-test@{PROJECT_ID}.iam.gserviceaccount.com",
+        "client_id": "1",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    }))
+
+
+def app_env(args, ports: dict, workdir: Path) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir / 'load.db'}",
+        "FIREBASE_SERVICE_ACCOUNT_PATH": str(workdir / "service-account.json"),
+        "FIREBASE_AUTH_EMULATOR_HOST": f"127.0.0.1:{ports['firebase']}",
+        "FIREBASE_API_KEY": "load-test",
+        "JWT_SECRET_KEY": "load-test-secret-" + "x" * 32,
+        "REDIS_URL": f"redis://127.0.0.1:{ports['redis']}/0",
+        "EMAIL_HOST": "127.0.0.1",
+        "EMAIL_PORT": str(ports["smtp"]),
+        "EMAIL_USE_TLS": "false",
+        "EMAIL_USER": "",
+        "EMAIL_PASS": "",
+        "EMAIL_FROM": "load-test@example.com",
+        "APP_NAME": "Load Test",
+        "DNS_NAMESERVERS": f"127.0.0.1:{ports['dns']}",
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limit else "false",
+    })
+    return env
+
+
+async def wait_until_up(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("The app exited during startup")
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise SystemExit("The app did not start in time")
+
+
+class LoadTest:
+    def __init__(self, args, client: httpx.AsyncClient, firebase_url: str):
+        self.args = args
+        self.client = client
+        self.firebase = httpx.AsyncClient(base_url=firebase_url)
+        self.run_id = os.urandom(3).hex()
+        self.weights = parse_mix(args.mix)
+        self.users = []  # emails that can log in
+        self.google_tokens = []
+        self.registered = 0
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    async def _firebase(self, method: str, body: dict) -> dict:
+        response = await self.firebase.post(f"/identitytoolkit.googleapis.com/v1/projects/{PROJECT_ID}/{method}", json=body)
+        return response.json()
+
+    async def _verified_user(self, email: str):
+        response = await self.client.post("/api/auth/email-register", json={
+            "email": email, "password": PASSWORD, "display_name": "Load Test"
+        })
+        response.raise_for_status()
+        uid = (await self._firebase("accounts:lookup", {"email": [email]}))["users"][0]["localId"]
+        await self._firebase("accounts:update", {"localId": uid, "emailVerified": True})
+        self.users.append(email)
+
+    async def _google_user(self, index: int):
+        uid = (await self._firebase("accounts", {
+            "email": f"lt-{self.run_id}-g{index}@example.com", "displayName": f"Google {index}", "emailVerified": True
+        }))["localId"]
+        token = (await self.firebase.get("/stub/id-token", params={"uid": uid, "project": PROJECT_ID})).json()["idToken"]
+        self.google_tokens.append(token)
+
+    async def seed(self, database_url: str):
+        semaphore = asyncio.Semaphore(16)
+
+        async def bounded(coro):
+            async with semaphore:
+                await coro
+
+        await asyncio.gather(*(
+            bounded(self._verified_user(f"lt-{self.run_id}-u{i}@example.com")) for i in range(self.args.users)
+        ))
+        await asyncio.gather(*(bounded(self._google_user(i)) for i in range(max(5, self.args.users // 4))))
+        await asyncio.to_thread(seed_products, database_url, self.args.products)
+
+    async def register(self, state: dict) -> httpx.Response:
+        self.registered += 1
+        return await self.client.post("/api/auth/email-register", json={
+            "email": f"lt-{self.run_id}-r{self.registered}@example.com", "password": PASSWORD, "display_name": "Load Test"
+        })
+
+    async def login(self, state: dict) -> httpx.Response:
+        return await self.client.post("/api/auth/email-login", json={
+            "email": state["rng"].choice(self.users), "password": PASSWORD
+        })
+
+    async def google(self, state: dict) -> httpx.Response:
+        return await self.client.post("/api/auth/login-google", json={"id_token": state["rng"].choice(self.google_tokens)})
+
+    async def setup_refresh(self, state: dict):
+        # Each virtual client keeps its own rotating refresh token
+        if not state.get("refresh_token"):
+            response = await self.login(state)
+            state["refresh_token"] = response.json().get("refresh_token") if response.status_code == 200 else None
+
+    async def refresh(self, state: dict) -> httpx.Response:
+        response = await self.client.post("/api/auth/refresh", json={"refresh_token": state["refresh_token"]})
+        state["refresh_token"] = response.json().get("refresh_token") if response.status_code == 200 else None
+        return response
+
+    async def products(self, state: dict) -> httpx.Response:
+        return await self.client.get("/api/products")
+
+    async def request(self, name: str, state: dict, record_from: float):
+        setup = getattr(self, f"setup_{name}", None)
+        start = None
+        try:
+            if setup is not None:
+                await setup(state)  # not timed
+            start = time.perf_counter()
+            status = (await getattr(self, name)(state)).status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+        if start is not None and start >= record_from:
+            self.latencies[name].append(finished - start)
+            self.statuses[name][status] += 1
+
+    async def worker(self, index: int, mix: dict, record_from: float, deadline: float):
+        state = {"rng": random.Random(index)}
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            await self.request(state["rng"].choices(names, weights)[0], state, record_from)
+
+    async def probe(self, mix: dict, rate: float, record_from: float, deadline: float):
+        """Open loop: requests start every 1/rate seconds however slowly earlier ones are answered"""
+        rng = random.Random(-1)
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        requests = []
+        next_start = time.perf_counter()
+        while next_start < deadline:
+            await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+            state = {"rng": random.Random(rng.random())}
+            requests.append(asyncio.create_task(self.request(rng.choices(names, weights)[0], state, record_from)))
+            next_start += 1 / rate
+        await asyncio.gather(*requests)
+
+    async def run(self, mix: dict, concurrency: int, probes: dict = None) -> dict:
+        """mix on concurrency closed-loop workers, plus probes at --probe-rate"""
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        start = time.perf_counter()
+        record_from = start + self.args.warmup
+        deadline = record_from + self.args.duration
+        tasks = [self.worker(i, mix, record_from, deadline) for i in range(concurrency)]
+        if probes:
+            tasks.append(self.probe(probes, self.args.probe_rate, record_from, deadline))
+        await asyncio.gather(*tasks)
+        return self.report({**mix, **(probes or {})})
+
+    def report(self, mix: dict) -> dict:
+        endpoints = {}
+        for name in mix:
+            endpoints[name] = summarize(self.latencies[name], self.statuses[name], self.args.duration)
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        all_statuses = sum(self.statuses.values(), Counter())
+        return {"endpoints": endpoints, "total": summarize(all_latencies, all_statuses, self.args.duration)}
+
+
+def seed_products(database_url: str, count: int):
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO product (name, price, image) VALUES (:name, :price, :image)"),
+            [{"name": f"Product {i}", "price": f"Rs. {100 + i}", "image": f"https://example.com/{i}.jpg"} for i in range(count)]
+        )
+    engine.dispose()
+
+
+def percentile(ordered: list, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies: list, statuses: Counter, duration: float) -> dict:
+    ordered = sorted(latencies)
+    ok = sum(count for status, count in statuses.items() if isinstance(status, int) and status < 400)
+    return {
+        "requests": len(ordered),
+        "errors": len(ordered) - ok,
+        "status_codes": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(len(ordered) / duration, 1),
+        "latency_ms": {
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+    }
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout
+        return revision + ("-dirty" if dirty.strip() else "")
+    except OSError:
+        return "unknown"
+
+
+def print_comparison(previous: dict, current: dict):
+    """Human-readable deltas on stderr, so stdout stays JSON"""
+    print(f"\n{'endpoint':<10} {'rps':>22} {'p50 ms':>22} {'p95 ms':>22} {'p99 ms':>22}", file=sys.stderr)
+    for name, now in {**current["endpoints"], "total": current["total"]}.items():
+        before = previous["endpoints"].get(name) if name != "total" else previous.get("total")
+        if not before:
+            continue
+        cells = []
+        for old, new in (
+            (before["throughput_rps"], now["throughput_rps"]),
+            (before["latency_ms"]["p50"], now["latency_ms"]["p50"]),
+            (before["latency_ms"]["p95"], now["latency_ms"]["p95"]),
+            (before["latency_ms"]["p99"], now["latency_ms"]["p99"]),
+        ):
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            cells.append(f"{old:>8} -> {new:<8} {change:>4}")
+        print(f"{name:<10} " + " ".join(f"{cell:>22}" for cell in cells), file=sys.stderr)
+
+
+async def main(args):
+    ports = {name: free_port() for name in ("firebase", "smtp", "dns", "redis", "app")}
+    ready = multiprocessing.Event()
+    stubs = multiprocessing.Process(target=run_stubs, args=(ports, ready), daemon=True)
+    stubs.start()
+    if not ready.wait(30):
+        raise SystemExit("Stub services did not start")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        write_service_account(workdir / "service-account.json")
+        env = app_env(args, ports, workdir)
+        app = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(ports["app"]),
+             "--workers", str(args.app_workers), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env
+        )
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{ports['app']}", limits=limits, timeout=60) as client:
+                await wait_until_up(client, app)
+                load = LoadTest(args, client, f"http://127.0.0.1:{ports['firebase']}")
+                await load.seed(env["DATABASE_URL"])
+                if args.mix == "login-storm":
+                    storm = {"login": load.weights["login"]}
+                    probes = {name: weight for name, weight in load.weights.items() if name != "login"}
+                    results = await load.run(storm, args.concurrency, probes)
+                    quiet = await load.run({}, 0, probes)
+                    results["no_storm"] = quiet
+                    results["probe_p99_ms"] = {
+                        name: {"storm": results["endpoints"][name]["latency_ms"]["p99"],
+                               "no_storm": quiet["endpoints"][name]["latency_ms"]["p99"]}
+                        for name in probes
+                    }
+                else:
+                    results = await load.run(load.weights, args.concurrency)
+                await load.firebase.aclose()
+        finally:
+            app.terminate()
+            app.wait(15)
+            stubs.terminate()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "mix": load.weights,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "database": env["DATABASE_URL"].split(":", 1)[0],
+            "app_workers": args.app_workers,
+            "users": args.users,
+            "products": args.products,
+            "rate_limit": args.rate_limit,
+        },
+        **results,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    if args.compare:
+        print_comparison(json.loads(Path(args.compare).read_text()), results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mix", default="mixed", help=f"preset ({', '.join(MIXES)}) or weights like login=3,products=1")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds, after the warmup")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--users", type=int, default=100, help="verified email users to log in as")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--database-url", default=None, help="defaults to a throwaway SQLite file")
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--rate-limit", action="store_true", help="keep auth rate limits on (off by default)")
+    parser.add_argument("--probe-rate", type=float, default=5.0, help="login-storm: probe requests per second")
+    parser.add_argument("--output", default=None, help="also write the JSON report here")
+    parser.add_argument("--compare", default=None, help="previous report to print deltas against")
+    asyncio.run(main(parser.parse_args()))
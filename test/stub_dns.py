@@ -0,0 +1,79 @@
+"""
+Tiny authoritative DNS stand-in for MX checks.
+
+Domains listed in MX_DOMAINS answer with an MX record, anything in
+NO_MX_DOMAINS exists without one, and everything else is NXDOMAIN. Point the
+backend at it with DNS_NAMESERVERS=127.0.0.1:5353.
+"""
+import socket
+import threading
+import time
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import dns.rrset
+
+PORT = 5353
+TTL = 300
+
+MX_DOMAINS = {"example.com", "gmail.com", "company.test"}
+NO_MX_DOMAINS = {"no-mail.test"}
+
+
+class StubDNSServer:
+    def __init__(self, port: int = PORT, mx_domains=MX_DOMAINS, no_mx_domains=NO_MX_DOMAINS, ttl: int = TTL, delay: float = 0.0):
+        self.mx_domains = set(mx_domains)
+        self.no_mx_domains = set(no_mx_domains)
+        self.ttl = ttl
+        self.delay = delay  # simulated upstream latency
+        self.queries = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", port))
+        self.port = self.sock.getsockname()[1]
+        self._thread = None
+
+    def _answer(self, wire: bytes) -> bytes:
+        query = dns.message.from_wire(wire)
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA
+        question = query.question[0]
+        domain = question.name.to_text(omit_final_dot=True).lower()
+        if domain in self.mx_domains and question.rdtype == dns.rdatatype.MX:
+            response.answer.append(dns.rrset.from_text(question.name, self.ttl, "IN", "MX", f"10 mx.{domain}."))
+        elif domain not in self.mx_domains and domain not in self.no_mx_domains:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        return response.to_wire()
+
+    def _serve(self):
+        while True:
+            try:
+                wire, addr = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.queries += 1
+            if self.delay:
+                time.sleep(self.delay)
+            self.sock.sendto(self._answer(wire), addr)
+
+    def start(self) -> "StubDNSServer":
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    server = StubDNSServer()
+    print(f"Stub DNS running at 127.0.0.1:{server.port}")
+    print(f"Set DNS_NAMESERVERS=127.0.0.1:{server.port}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        print("\nServer stopped.")
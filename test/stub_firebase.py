@@ -0,0 +1,194 @@
+"""
+Minimal in-memory stand-in for the Firebase Auth (Identity Toolkit) API.
+
+Point the backend at it with FIREBASE_AUTH_EMULATOR_HOST=localhost:9099; the
+Admin SDK and AsyncFirebaseAuth.rest_post both honor that variable.
+"""
+import base64
+import json
+import time
+import uuid
+import http.server
+import socketserver
+from urllib.parse import urlparse, parse_qs
+
+PORT = 9099
+DEFAULT_PROJECT_ID = "demo-project"
+
+users = {}  # uid -> Identity Toolkit user resource
+oob_codes = {}  # oobCode -> (requestType, email)
+uids_by_email = {}  # email -> uid, so lookups stay O(1) with many users
+
+
+def _b64(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def make_id_token(uid: str, project_id: str = DEFAULT_PROJECT_ID) -> str:
+    """Unsigned ID token, accepted by the Admin SDK in emulator mode"""
+    now = int(time.time())
+    user = users.get(uid, {})
+    claims = {
+        "iss": f"https://securetoken.google.com/{project_id}",
+        "aud": project_id,
+        "auth_time": now,
+        "user_id": uid,
+        "sub": uid,
+        "iat": now,
+        "exp": now + 3600,
+        "email": user.get("email"),
+        "email_verified": user.get("emailVerified", False),
+        "name": user.get("displayName"),
+        "picture": user.get("photoUrl"),
+        "firebase": {
+            "sign_in_provider": "google.com",
+            "identities": {"google.com": [uid], "email": [user.get("email")]},
+        },
+    }
+    return f"{_b64({'alg': 'none', 'typ': 'JWT'})}.{_b64(claims)}."
+
+
+def find_by_email(email: str):
+    return users.get(uids_by_email.get(email))
+
+
+def create_user(body: dict) -> dict:
+    uid = body.get("localId") or uuid.uuid4().hex[:28]
+    user = {
+        "localId": uid,
+        "email": body.get("email"),
+        "displayName": body.get("displayName"),
+        "photoUrl": body.get("photoUrl"),
+        "emailVerified": body.get("emailVerified", False),
+        "disabled": body.get("disabled", False),
+        "providerUserInfo": body.get("providerUserInfo", []),
+        "createdAt": str(int(time.time() * 1000)),
+    }
+    if body.get("passwordHash") or body.get("password"):
+        user["passwordHash"] = body.get("passwordHash") or "stub"
+    users[uid] = user
+    if user["email"]:
+        uids_by_email[user["email"]] = uid
+    return user
+
+
+class StubFirebaseHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, message: str, status: int = 400):
+        self._send(status, {"error": {"code": status, "message": message}})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/stub/id-token":
+            query = parse_qs(parsed.query)
+            uid = query.get("uid", [""])[0]
+            project_id = query.get("project", [DEFAULT_PROJECT_ID])[0]
+            return self._send(200, {"idToken": make_id_token(uid, project_id)})
+        if parsed.path == "/stub/users":
+            return self._send(200, {"users": list(users.values())})
+        self._error("NOT_FOUND", 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        # Admin SDK: /identitytoolkit.googleapis.com/v1/projects/<id>/accounts:lookup
+        # REST API:  /identitytoolkit.googleapis.com/v1/accounts:resetPassword
+        path = urlparse(self.path).path
+        method = path.rsplit("/", 1)[-1]
+        handler = getattr(self, "handle_" + method.replace(":", "_"), None)
+        if handler is None:
+            return self._error(f"UNSUPPORTED_METHOD: {method}", 404)
+        handler(body)
+
+    def handle_accounts(self, body):
+        if body.get("email") and find_by_email(body["email"]):
+            return self._error("EMAIL_EXISTS")
+        self._send(200, {"localId": create_user(body)["localId"]})
+
+    def handle_accounts_lookup(self, body):
+        found = []
+        for uid in body.get("localId", []):
+            if uid in users:
+                found.append(users[uid])
+        for email in body.get("email", []):
+            user = find_by_email(email)
+            if user:
+                found.append(user)
+        self._send(200, {"users": found} if found else {})
+
+    def handle_accounts_update(self, body):
+        user = users.get(body.get("localId"))
+        if not user:
+            return self._error("USER_NOT_FOUND")
+        if "email" in body:
+            uids_by_email.pop(user.get("email"), None)
+            uids_by_email[body["email"]] = user["localId"]
+        for key in ("email", "displayName", "photoUrl", "emailVerified", "disableUser"):
+            if key in body:
+                user["disabled" if key == "disableUser" else key] = body[key]
+        self._send(200, {"localId": user["localId"]})
+
+    def handle_accounts_batchCreate(self, body):
+        errors = []
+        for index, user in enumerate(body.get("users", [])):
+            if user.get("email") and find_by_email(user["email"]):
+                errors.append({"index": index, "message": "EMAIL_EXISTS"})
+            else:
+                create_user(user)
+        self._send(200, {"error": errors} if errors else {})
+
+    def handle_accounts_sendOobCode(self, body):
+        email = body.get("email")
+        if not find_by_email(email):
+            return self._error("EMAIL_NOT_FOUND")
+        code = uuid.uuid4().hex
+        oob_codes[code] = (body.get("requestType"), email)
+        link = f"http://localhost:{PORT}/stub/action?mode={body.get('requestType')}&oobCode={code}"
+        self._send(200, {"email": email, "oobLink": link})
+
+    def handle_accounts_resetPassword(self, body):
+        entry = oob_codes.pop(body.get("oobCode"), None)
+        if not entry or entry[0] != "PASSWORD_RESET":
+            return self._error("INVALID_OOB_CODE")
+        find_by_email(entry[1])["passwordHash"] = "stub"
+        self._send(200, {"email": entry[1], "requestType": "PASSWORD_RESET"})
+
+    def handle_accounts_signInWithEmailLink(self, body):
+        entry = oob_codes.pop(body.get("oobCode"), None)
+        if not entry or entry[0] != "EMAIL_SIGNIN" or entry[1] != body.get("email"):
+            return self._error("INVALID_OOB_CODE")
+        user = find_by_email(entry[1])
+        user["emailVerified"] = True
+        self._send(200, {"email": entry[1], "localId": user["localId"], "idToken": make_id_token(user["localId"])})
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(port: int = PORT) -> ThreadingServer:
+    return ThreadingServer(("127.0.0.1", port), StubFirebaseHandler)
+
+
+if __name__ == "__main__":
+    with serve() as httpd:
+        print(f"Stub Firebase Auth running at http://localhost:{PORT}")
+        print(f"Set FIREBASE_AUTH_EMULATOR_HOST=localhost:{PORT}")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nServer stopped.")
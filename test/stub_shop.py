@@ -0,0 +1,131 @@
+"""
+Fixture server for the scrape jobs: replays the saved Daraz search JSON and
+Flipkart search HTML in test/fixtures as a paginated catalog.
+
+    /daraz/catalog/?ajax=true&q=...&page=N   -> Daraz JSON, empty listItems past the last page
+    /flipkart/search?q=...&page=N            -> Flipkart HTML, no product cards past the last page
+
+Item ids are rewritten per page so every page holds distinct products. It can
+also inject failures (429 with Retry-After, or 503) and latency, to exercise
+the scraper's retries.
+
+    python test/stub_shop.py [--port 8098] [--pages 25] [--fail-rate 0.1] [--latency 0.05]
+"""
+import argparse
+import http.server
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PORT = 8098
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+FLIPKART_CARD = '<div class="_1AtVbE col-12-12"><div class="_13oc-S">'
+FLIPKART_PAGER = '<div class="_1AtVbE col-12-12"><div class="_2MImiq _1Qnn1K">'
+FLIPKART_PID = re.compile(r"(pid=|data-id=\")([A-Z0-9]{16})")
+
+
+def daraz_page(fixture: dict, page: int) -> dict:
+    items = []
+    for item in fixture["mods"]["listItems"]:
+        item = dict(item)
+        item_id = str(int(item["itemId"]) + page * 10**9)
+        item["productUrl"] = item["productUrl"].replace(item["itemId"], item_id)
+        item["itemId"] = item["nid"] = item_id
+        items.append(item)
+    return {**fixture, "mainInfo": {**fixture["mainInfo"], "page": str(page)}, "mods": {**fixture["mods"], "listItems": items}}
+
+
+def flipkart_page(fixture: str, page: int) -> str:
+    return FLIPKART_PID.sub(lambda match: f"{match.group(1)}{match.group(2)[:12]}{page:04d}", fixture)
+
+
+class ShopHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection reuse is visible
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/plain", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            failure = server.rng.random() < server.fail_rate
+        if server.latency:
+            time.sleep(server.latency)
+        if failure:
+            if server.rng.random() < 0.5:
+                return self._send(429, b"Too Many Requests", headers={"Retry-After": "0"})
+            return self._send(503, b"Service Unavailable")
+
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        if url.path.startswith("/daraz/catalog"):
+            body = server.daraz_pages.get(page) if page <= server.pages else server.daraz_empty
+            return self._send(200, body, "application/json; charset=utf-8")
+        if url.path.startswith("/flipkart/search"):
+            body = server.flipkart_pages.get(page) if page <= server.pages else server.flipkart_empty
+            return self._send(200, body, "text/html; charset=utf-8")
+        self._send(404, b"Not Found")
+
+
+class StubShop(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = PORT, pages: int = 25, fail_rate: float = 0.0, latency: float = 0.0, seed: int = 0):
+        super().__init__(("127.0.0.1", port), ShopHandler)
+        self.port = self.server_address[1]
+        self.pages = pages
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+        daraz = json.loads((FIXTURES / "daraz_catalog.json").read_text())
+        flipkart = (FIXTURES / "flipkart_search.html").read_text()
+        # Rendered up front so serving costs the same as replaying a recording
+        self.daraz_pages = {page: json.dumps(daraz_page(daraz, page)).encode() for page in range(1, pages + 1)}
+        self.daraz_empty = json.dumps({**daraz, "mods": {"filter": daraz["mods"]["filter"]}}).encode()
+        self.flipkart_pages = {page: flipkart_page(flipkart, page).encode() for page in range(1, pages + 1)}
+        start, end = flipkart.index(FLIPKART_CARD), flipkart.index(FLIPKART_PAGER)
+        self.flipkart_empty = (flipkart[:start] + flipkart[end:]).encode()  # product cards cut out
+
+    def url(self, site: str, query: str = "phone") -> str:
+        path = "daraz/catalog/?ajax=true&isFirstRequest=true" if site == "daraz" else "flipkart/search?"
+        return f"http://127.0.0.1:{self.port}/{path}&q={query}&page=1".replace("?&", "?")
+
+    def start(self) -> "StubShop":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--pages", type=int, default=25)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    shop = StubShop(args.port, args.pages, args.fail_rate, args.latency).start()
+    print(f"Stub shop running: {shop.url('daraz')} and {shop.url('flipkart')}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        shop.shutdown()
+        print(f"\nServer stopped after {shop.requests} requests.")
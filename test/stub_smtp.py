@@ -0,0 +1,64 @@
+"""
+SMTP sink that accepts every message and keeps only a count, for pointing
+EMAIL_HOST/EMAIL_PORT at during local runs (with EMAIL_USE_TLS=false).
+"""
+import socketserver
+import threading
+import time
+
+PORT = 8025
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self._reply("220 stub-smtp ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-stub-smtp\r\n250 8BITMIME\r\n")
+            elif command.startswith(("HELO", "MAIL", "RCPT", "RSET", "NOOP")):
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self._reply("250 OK: queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = PORT):
+        super().__init__(("127.0.0.1", port), SMTPSinkHandler)
+        self.port = self.server_address[1]
+        self.messages = 0
+        self.lock = threading.Lock()
+
+    def start(self) -> "SMTPSink":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    sink = SMTPSink().start()
+    print(f"SMTP sink running at 127.0.0.1:{sink.port} (set EMAIL_USE_TLS=false)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sink.shutdown()
+        print(f"\nServer stopped after {sink.messages} messages.")
@@ -0,0 +1,72 @@
+"""
+Refresh tokens issued before a password reset stop working after it.
+
+Runs the app in-process against test/stub_firebase.py and a throwaway SQLite
+database; Redis and SMTP aren't needed.
+
+    python test/test_password_reset.py
+"""
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "benchmarks"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from _env import configure
+
+FIREBASE_PORT = 9198
+
+
+def test_refresh_after_password_reset_is_rejected():
+    from load_test import write_service_account
+
+    workdir = Path(tempfile.mkdtemp())
+    database = workdir / "reset.db"
+    write_service_account(workdir / "service-account.json")
+    configure(
+        DATABASE_URL=f"sqlite:///{database}",
+        FIREBASE_SERVICE_ACCOUNT_PATH=workdir / "service-account.json",
+        FIREBASE_AUTH_EMULATOR_HOST=f"127.0.0.1:{FIREBASE_PORT}",
+        REDIS_URL="redis://127.0.0.1:1/0",
+    )
+    import stub_firebase
+    from fastapi.testclient import TestClient
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from app.core.database import get_async_engine
+    from app.main import app
+    from app.models.user import User
+    from app.services.password_service import password_hasher
+    from app.services.token_service import issue_tokens
+
+    email = "reset@example.com"
+    uid = stub_firebase.create_user({"email": email})["localId"]
+    stub_firebase.oob_codes["reset-code"] = ("PASSWORD_RESET", email)
+
+    async def login() -> str:
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            user = User(firebase_uid=uid, email=email, password=await password_hasher.hash("old"), is_email_verified=True)
+            session.add(user)
+            await session.commit()
+            await session.refresh(user)
+            return (await issue_tokens(session, user))[1]
+
+    server = stub_firebase.serve(FIREBASE_PORT)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with TestClient(app) as client:
+            refresh_token = client.portal.call(login)
+            response = client.post("/api/auth/set-new-password", json={"oobCode": "reset-code", "new_password": "new"})
+            assert response.status_code == 200, response.text
+            response = client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+            assert response.status_code == 401, response.text
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_refresh_after_password_reset_is_rejected()
+    print("ok")